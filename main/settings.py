@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,12 +48,17 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'objectifs.routeurs.EcritureStickyMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'main.urls'
 
+# Sans 'loaders' explicite, Django enveloppe les loaders dans le loader en
+# cache (django.template.loaders.cached.Loader) : chaque template n'est
+# analysé qu'une fois par processus. En production (DEBUG=False) il n'est
+# jamais invalidé ; en développement, il est vidé quand un template change.
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -80,9 +86,103 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Base de test sur fichier : la base en mémoire partagée refuse
+        # les écritures concurrentes au lieu de les mettre en attente
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+# Profil de base : DJANGO_DB_PROFILE=production active WAL, l'attente sur
+# verrou et la réutilisation des connexions (vérifié par objectifs.checks)
+DB_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'developpement')
+
+# Valeurs attendues sur chaque connexion SQLite en production
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 1,                  # NORMAL : sûr en WAL, fsync au checkpoint
+    'busy_timeout': 5000,              # ms d'attente avant « database is locked »
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,              # négatif = en Kio, soit ~64 Mo
+    'foreign_keys': 1,
+}
+
+# Journal de l'application (pragmas SQLite effectifs au démarrage)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'objectifs': {
+            'handlers': ['console'],
+            'level': os.environ.get('DJANGO_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Prend le verrou d'écriture dès BEGIN : pas d'échec à la
+            # promotion lecture -> écriture, busy_timeout s'applique
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000,
+            'init_command': ''.join(
+                f'PRAGMA {pragma}={valeur};' for pragma, valeur in SQLITE_PRAGMAS.items()
+            ),
+        },
+    })
+
+# Copie en lecture : DJANGO_DB_REPLICA=<chemin> ajoute l'alias 'replica',
+# servi aux vues @lecture_replica et alimenté par synchroniser_replica
+REPLICA_LECTURE = 'replica'
+REPLICA_STICKY_SECONDES = 10
+
+if os.environ.get('DJANGO_DB_REPLICA'):
+    DATABASES[REPLICA_LECTURE] = {
+        **DATABASES['default'],
+        'NAME': Path(os.environ['DJANGO_DB_REPLICA']),
+        # En test, la copie est la base de test principale
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['objectifs.routeurs.RouteurLectureEcriture']
+
+# Cache (données par stagiaire, voir objectifs.cache_stagiaire) :
+# DJANGO_CACHE=locmem (défaut, par processus) ou fichier (partagé entre workers)
+CACHE_BACKEND = os.environ.get('DJANGO_CACHE', 'locmem')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    } if CACHE_BACKEND == 'fichier' else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'objectifs',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Hachage des mots de passe : le premier sert aux nouveaux mots de passe ;
+# le jeton initial des imports de cohorte est re-haché à la première connexion
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'objectifs.inscriptions.HasheurJetonInitial',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -1,20 +1,171 @@
+import calendar
+
 from django.contrib import admin
 
 # Register your models here.
-from django.contrib import admin
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.html import format_html
-from .models import ProfilStagiaire, Tache, Semaine, SalaireMensuel, Evaluation
+from django.db.models import Q, F, Max, Case, When, Value, DateField, DecimalField, DurationField, FloatField, ExpressionWrapper
+from django.db.models.functions import Cast, Least
+from .models import ProfilStagiaire, Tache, SaisieHeures, Semaine, SalaireMensuel, Evaluation
+from .rollups import recalculer_semaines, recalculer_salaires
+from .lots import changer_statut_taches
+from .recherche import condition_recherche, stagiaires_par_nom
+from .cache_stagiaire import invalider_stagiaires
+
+
+class RechercheTexteMixin:
+    """
+    Recherche admin via l'index FTS5 (``index_recherche``) au lieu de
+    LIKE '%terme%' sur chaque ligne ; les noms d'utilisateur sont cherchés
+    dans la table des profils puis reliés par ``chemin_stagiaire``.
+    """
+    index_recherche = None
+    chemin_stagiaire = None
+    
+    def get_search_results(self, request, queryset, search_term):
+        condition = condition_recherche(self.index_recherche, search_term)
+        if condition is None:
+            return super().get_search_results(request, queryset, search_term)
+        if self.chemin_stagiaire:
+            condition |= Q(**{f'{self.chemin_stagiaire}__in': stagiaires_par_nom(search_term)})
+        return queryset.filter(condition), False
+
+
+class FiltreSaisie(admin.ListFilter):
+    """
+    Filtre par valeur saisie (identifiant, établissement...) : rien n'est
+    chargé pour construire la barre de filtres, quelle que soit la table.
+    """
+    template = 'admin/filtre_saisie.html'
+    parameter_name = None
+    champ = None
+    
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        valeur = params.pop(self.parameter_name, '')
+        # Django >= 5.0 : liste des valeurs du paramètre
+        if isinstance(valeur, list):
+            valeur = valeur[-1] if valeur else ''
+        self.valeur = valeur.strip()
+    
+    def has_output(self):
+        return True
+    
+    def expected_parameters(self):
+        return [self.parameter_name]
+    
+    def queryset(self, request, queryset):
+        if self.valeur:
+            return queryset.filter(**{self.champ: self.valeur})
+        return queryset
+    
+    def choices(self, changelist):
+        yield {
+            'selected': not self.valeur,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'display': 'Tous',
+        }
+
+
+def filtre_saisie(champ, titre, parametre):
+    return type('FiltreSaisie', (FiltreSaisie,), {'champ': champ, 'title': titre, 'parameter_name': parametre})
+
+
+class FiltrePlage(admin.SimpleListFilter):
+    """
+    Choix fixes (semaines, mois, années) : pas de SELECT DISTINCT sur la table.
+    Une sous-classe fournit ``champ`` et ``valeurs`` (fonction sans argument
+    qui retourne les choix), vérifiés dès sa définition.
+    """
+    champ = None
+    valeurs = None
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.champ is None or not callable(cls.valeurs):
+            raise ImproperlyConfigured(f"{cls.__name__} doit définir champ et valeurs")
+    
+    def lookups(self, request, model_admin):
+        return self.valeurs()
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.champ: self.value()})
+        return queryset
+
+
+def filtre_plage(champ, titre, valeurs):
+    return type('FiltrePlage', (FiltrePlage,), {
+        'champ': champ, 'title': titre, 'parameter_name': champ, 'valeurs': staticmethod(valeurs),
+    })
+
+
+def _annees():
+    annee = timezone.now().year
+    return [(str(valeur), str(valeur)) for valeur in range(annee + 1, annee - 5, -1)]
+
+
+def _semaines():
+    return [(str(numero), f'S{numero}') for numero in range(1, 54)]
+
+
+def _mois():
+    return [(str(numero), calendar.month_name[numero]) for numero in range(1, 13)]
+
+
+FILTRE_STAGIAIRE = filtre_saisie('stagiaire__user__username', 'stagiaire (identifiant)', 'stagiaire')
+
+
+class PaginateurApproximatif(Paginator):
+    """
+    Sans filtre, le total d'une grande table est estimé par le plus grand
+    identifiant (lecture d'index) au lieu d'un COUNT(*) complet.
+    """
+    SEUIL_COMPTAGE_EXACT = 50000
+    
+    @cached_property
+    def count(self):
+        requete = getattr(self.object_list, 'query', None)
+        if requete is not None and not requete.where:
+            modele = self.object_list.model
+            estimation = modele._default_manager.order_by().aggregate(estimation=Max('pk'))['estimation'] or 0
+            if estimation > self.SEUIL_COMPTAGE_EXACT:
+                return estimation
+        return super().count
+
+
+def _couleur(valeur, seuil_haut, seuil_bas):
+    if valeur >= seuil_haut:
+        return 'green'
+    if valeur >= seuil_bas:
+        return 'orange'
+    return 'red'
 
 
 @admin.register(ProfilStagiaire)
-class ProfilStagiaireAdmin(admin.ModelAdmin):
+class ProfilStagiaireAdmin(RechercheTexteMixin, admin.ModelAdmin):
     list_display = [
         'nom_complet', 'etablissement', 'statut', 'niveau_competence',
         'taux_horaire', 'date_debut_stage', 'date_fin_stage', 'jours_restants_display'
     ]
-    list_filter = ['statut', 'niveau_competence', 'date_debut_stage', 'etablissement']
+    list_filter = [
+        'statut', 'niveau_competence', 'date_debut_stage',
+        filtre_saisie('etablissement__icontains', 'établissement', 'etablissement'),
+    ]
+    list_select_related = ['user']
+    autocomplete_fields = ['user', 'tuteur']
     search_fields = ['user__first_name', 'user__last_name', 'user__username', 'etablissement']
-    readonly_fields = ['date_creation', 'date_modification', 'age', 'duree_stage_jours']
+    index_recherche = 'stagiaire'
+    chemin_stagiaire = 'pk'
+    readonly_fields = [
+        'date_creation', 'date_modification', 'age', 'duree_stage_jours',
+        'derniere_note', 'note_moyenne', 'tendance_note', 'nombre_evaluations', 'evaluations_par_type'
+    ]
     
     fieldsets = (
         ('Utilisateur', {
@@ -41,14 +192,31 @@ class ProfilStagiaireAdmin(admin.ModelAdmin):
         ('Compétences', {
             'fields': ('competences', 'objectifs_stage', 'notes_internes')
         }),
+        ('Évaluations', {
+            'fields': (
+                'derniere_note', 'note_moyenne', 'tendance_note',
+                'nombre_evaluations', 'evaluations_par_type'
+            ),
+            'classes': ('collapse',)
+        }),
         ('Métadonnées', {
             'fields': ('date_creation', 'date_modification'),
             'classes': ('collapse',)
         }),
     )
     
+    def get_queryset(self, request):
+        # Durée jusqu'à la fin du stage calculée en SQL (triable) ; l'utilisateur
+        # est joint aussi pour l'autocomplétion, qui affiche str(profil)
+        return super().get_queryset(request).select_related('user').annotate(
+            fin_stage_dans=ExpressionWrapper(
+                F('date_fin_stage') - Value(timezone.now().date(), output_field=DateField()),
+                output_field=DurationField(),
+            )
+        )
+    
     def jours_restants_display(self, obj):
-        jours = obj.jours_restants
+        jours = max(obj.fin_stage_dans.days, 0)
         if jours == 0:
             return format_html('<span style="color: red;">Terminé</span>')
         elif jours <= 7:
@@ -56,20 +224,29 @@ class ProfilStagiaireAdmin(admin.ModelAdmin):
         else:
             return format_html('<span style="color: green;">{} jours</span>', jours)
     jours_restants_display.short_description = 'Jours restants'
+    jours_restants_display.admin_order_field = 'fin_stage_dans'
 
 
 @admin.register(Tache)
-class TacheAdmin(admin.ModelAdmin):
+class TacheAdmin(RechercheTexteMixin, admin.ModelAdmin):
     list_display = [
         'titre', 'stagiaire', 'jour_semaine', 'priorite',
         'heures_effectuees', 'heures_estimees', 'pourcentage_display',
         'est_terminee', 'semaine_numero', 'annee'
     ]
     list_filter = [
-        'est_terminee', 'jour_semaine', 'priorite', 
-        'semaine_numero', 'annee', 'stagiaire'
+        'est_terminee', 'jour_semaine', 'priorite',
+        filtre_plage('semaine_numero', 'semaine', _semaines),
+        filtre_plage('annee', 'année', _annees),
+        FILTRE_STAGIAIRE,
     ]
+    list_select_related = ['stagiaire__user']
+    autocomplete_fields = ['stagiaire']
+    paginator = PaginateurApproximatif
+    show_full_result_count = False
     search_fields = ['titre', 'description', 'stagiaire__user__username']
+    index_recherche = 'tache'
+    chemin_stagiaire = 'stagiaire'
     readonly_fields = ['date_creation', 'date_modification', 'date_completion', 'pourcentage_completion']
     
     fieldsets = (
@@ -93,38 +270,66 @@ class TacheAdmin(admin.ModelAdmin):
     
     actions = ['marquer_terminee', 'marquer_non_terminee']
     
+    def get_queryset(self, request):
+        # Même calcul que Tache.pourcentage_completion, fait en SQL ; en
+        # flottants, SQLite stockant 2.00 comme l'entier 2 (division entière)
+        return super().get_queryset(request).annotate(
+            pourcentage=Case(
+                When(heures_estimees__gt=0, then=Least(
+                    Cast('heures_effectuees', FloatField()) * Value(100.0) / Cast('heures_estimees', FloatField()),
+                    Value(100.0),
+                )),
+                default=Value(0.0),
+                output_field=DecimalField(max_digits=6, decimal_places=2),
+            )
+        )
+    
     def pourcentage_display(self, obj):
-        pct = obj.pourcentage_completion
-        if pct >= 100:
-            color = 'green'
-        elif pct >= 50:
-            color = 'orange'
-        else:
-            color = 'red'
+        pct = obj.pourcentage
         return format_html(
-            '<span style="color: {};">{:.1f}%</span>',
-            color, pct
+            '<span style="color: {};">{}%</span>',
+            _couleur(pct, 100, 50), f'{pct:.1f}'
         )
     pourcentage_display.short_description = 'Progression'
+    pourcentage_display.admin_order_field = 'pourcentage'
+    
+    def _message_statut(self, request, resultat, libelle):
+        self.message_user(
+            request,
+            f"{resultat['taches']} tâche(s) marquée(s) comme {libelle}, {resultat['saisies']} saisie(s) "
+            f"au journal ; {resultat['semaines']} semaine(s) et {resultat['salaires']} salaire(s) recalculé(s)."
+        )
     
     def marquer_terminee(self, request, queryset):
-        from django.utils import timezone
-        count = 0
-        for tache in queryset:
-            tache.est_terminee = True
-            tache.date_completion = timezone.now()
-            tache.heures_effectuees = tache.heures_estimees
-            tache.save()
-            count += 1
-        self.message_user(request, f'{count} tâche(s) marquée(s) comme terminée(s).')
+        self._message_statut(request, changer_statut_taches(queryset, terminee=True), 'terminée(s)')
     marquer_terminee.short_description = 'Marquer comme terminée'
     
     def marquer_non_terminee(self, request, queryset):
-        count = queryset.update(est_terminee=False, date_completion=None)
-        self.message_user(request, f'{count} tâche(s) marquée(s) comme non terminée(s).')
+        self._message_statut(request, changer_statut_taches(queryset, terminee=False), 'non terminée(s)')
     marquer_non_terminee.short_description = 'Marquer comme non terminée'
 
 
+@admin.register(SaisieHeures)
+class SaisieHeuresAdmin(admin.ModelAdmin):
+    """Journal en lecture seule : les corrections passent par la tâche"""
+    list_display = ['date_saisie', 'stagiaire', 'tache', 'heures']
+    list_filter = ['date_saisie']
+    search_fields = ['tache__titre', 'stagiaire__user__username']
+    list_select_related = ['stagiaire__user', 'tache__stagiaire__user']
+    paginator = PaginateurApproximatif
+    show_full_result_count = False
+    date_hierarchy = 'date_saisie'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Semaine)
 class SemaineAdmin(admin.ModelAdmin):
     list_display = [
@@ -132,7 +337,15 @@ class SemaineAdmin(admin.ModelAdmin):
         'heures_totales', 'nombre_taches', 'taches_completees',
         'taux_completion_display', 'salaire_calcule'
     ]
-    list_filter = ['annee', 'numero_semaine', 'stagiaire']
+    list_filter = [
+        filtre_plage('annee', 'année', _annees),
+        filtre_plage('numero_semaine', 'semaine', _semaines),
+        FILTRE_STAGIAIRE,
+    ]
+    list_select_related = ['stagiaire__user']
+    autocomplete_fields = ['stagiaire']
+    paginator = PaginateurApproximatif
+    show_full_result_count = False
     search_fields = ['stagiaire__user__username']
     readonly_fields = [
         'date_creation', 'date_modification', 'taux_completion',
@@ -163,26 +376,27 @@ class SemaineAdmin(admin.ModelAdmin):
     
     actions = ['recalculer_totaux']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            taux=Case(
+                When(nombre_taches__gt=0, then=F('taches_completees') * 100.0 / F('nombre_taches')),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+    
     def taux_completion_display(self, obj):
-        taux = obj.taux_completion
-        if taux >= 80:
-            color = 'green'
-        elif taux >= 50:
-            color = 'orange'
-        else:
-            color = 'red'
         return format_html(
-            '<span style="color: {};">{:.1f}%</span>',
-            color, taux
+            '<span style="color: {};">{}%</span>',
+            _couleur(obj.taux, 80, 50), f'{obj.taux:.1f}'
         )
     taux_completion_display.short_description = 'Taux de complétion'
+    taux_completion_display.admin_order_field = 'taux'
     
+    @transaction.atomic
     def recalculer_totaux(self, request, queryset):
-        count = 0
-        for semaine in queryset:
-            semaine.calculer_totaux()
-            count += 1
-        self.message_user(request, f'{count} semaine(s) recalculée(s).')
+        nombre = recalculer_semaines(queryset)
+        self.message_user(request, f"{nombre} semaine(s) recalculée(s).")
     recalculer_totaux.short_description = 'Recalculer les totaux'
 
 
@@ -191,11 +405,19 @@ class SalaireMensuelAdmin(admin.ModelAdmin):
     list_display = [
         'stagiaire', 'mois_display', 'annee', 'heures_totales',
         'salaire_brut', 'bonus', 'deductions', 'salaire_net',
-        'est_paye', 'date_paiement'
+        'est_paye', 'date_paiement', 'est_cloture'
     ]
-    list_filter = ['annee', 'mois', 'est_paye', 'stagiaire']
+    list_filter = [
+        filtre_plage('annee', 'année', _annees),
+        filtre_plage('mois', 'mois', _mois),
+        'est_paye', 'est_cloture', FILTRE_STAGIAIRE,
+    ]
+    list_select_related = ['stagiaire__user']
+    autocomplete_fields = ['stagiaire']
+    paginator = PaginateurApproximatif
+    show_full_result_count = False
     search_fields = ['stagiaire__user__username']
-    readonly_fields = ['date_creation', 'date_modification', 'salaire_net']
+    readonly_fields = ['date_creation', 'date_modification', 'salaire_net', 'est_cloture', 'date_cloture']
     
     fieldsets = (
         ('Stagiaire et Période', {
@@ -208,7 +430,7 @@ class SalaireMensuelAdmin(admin.ModelAdmin):
             )
         }),
         ('Paiement', {
-            'fields': ('est_paye', 'date_paiement')
+            'fields': ('est_paye', 'date_paiement', 'est_cloture', 'date_cloture')
         }),
         ('Notes', {
             'fields': ('notes',)
@@ -221,35 +443,55 @@ class SalaireMensuelAdmin(admin.ModelAdmin):
     
     actions = ['marquer_paye', 'calculer_salaire_net']
     
+    def get_readonly_fields(self, request, obj=None):
+        # Mois clôturé (commande cloturer_mois) : montants figés
+        if obj is not None and obj.est_cloture:
+            return [*self.readonly_fields, 'heures_totales', 'salaire_brut', 'bonus', 'deductions']
+        return self.readonly_fields
+    
     def mois_display(self, obj):
-        import calendar
         return calendar.month_name[obj.mois]
     mois_display.short_description = 'Mois'
     
+    @transaction.atomic
     def marquer_paye(self, request, queryset):
-        from django.utils import timezone
-        count = queryset.update(est_paye=True, date_paiement=timezone.now().date())
-        self.message_user(request, f'{count} salaire(s) marqué(s) comme payé(s).')
+        a_payer = queryset.filter(est_paye=False)
+        invalider_stagiaires(a_payer.values_list('stagiaire_id', flat=True).distinct())
+        count = a_payer.update(
+            est_paye=True, date_paiement=timezone.now().date(), date_modification=timezone.now()
+        )
+        self.message_user(
+            request, f'{count} salaire(s) marqué(s) comme payé(s), {queryset.count() - count} déjà payé(s).'
+        )
     marquer_paye.short_description = 'Marquer comme payé'
     
+    @transaction.atomic
     def calculer_salaire_net(self, request, queryset):
-        count = 0
-        for salaire in queryset:
-            salaire.calculer_salaire_net()
-            count += 1
-        self.message_user(request, f'{count} salaire(s) recalculé(s).')
+        nombre = recalculer_salaires(queryset)
+        self.message_user(
+            request, f"{nombre} salaire(s) recalculé(s), {queryset.count() - nombre} clôturé(s) laissé(s) tel(s) quel(s)."
+        )
     calculer_salaire_net.short_description = 'Recalculer le salaire net'
 
 
 @admin.register(Evaluation)
-class EvaluationAdmin(admin.ModelAdmin):
+class EvaluationAdmin(RechercheTexteMixin, admin.ModelAdmin):
     list_display = [
         'stagiaire', 'type_evaluation', 'date_evaluation',
         'evaluateur', 'note_moyenne_display',
         'competence_technique', 'qualite_travail'
     ]
-    list_filter = ['type_evaluation', 'date_evaluation', 'stagiaire', 'evaluateur']
+    list_filter = [
+        'type_evaluation', 'date_evaluation', FILTRE_STAGIAIRE,
+        filtre_saisie('evaluateur__username', 'évaluateur (identifiant)', 'evaluateur'),
+    ]
+    list_select_related = ['stagiaire__user', 'evaluateur']
+    autocomplete_fields = ['stagiaire', 'evaluateur']
+    paginator = PaginateurApproximatif
+    show_full_result_count = False
     search_fields = ['stagiaire__user__username', 'evaluateur__username']
+    index_recherche = 'evaluation'
+    chemin_stagiaire = 'stagiaire'
     readonly_fields = ['date_creation', 'note_moyenne']
     
     fieldsets = (
@@ -276,15 +518,11 @@ class EvaluationAdmin(admin.ModelAdmin):
     )
     
     def note_moyenne_display(self, obj):
+        # note_moyenne est une colonne générée : rien à calculer par ligne
         note = obj.note_moyenne
-        if note >= 4:
-            color = 'green'
-        elif note >= 3:
-            color = 'orange'
-        else:
-            color = 'red'
         return format_html(
-            '<span style="color: {}; font-weight: bold;">{:.2f}/5</span>',
-            color, note
+            '<span style="color: {}; font-weight: bold;">{}/5</span>',
+            _couleur(note, 4, 3), f'{note:.2f}'
         )
-    note_moyenne_display.short_description = 'Note Moyenne'
\ No newline at end of file
+    note_moyenne_display.short_description = 'Note Moyenne'
+    note_moyenne_display.admin_order_field = 'note_moyenne'
\ No newline at end of file
@@ -6,4 +6,5 @@ class ObjectifsConfig(AppConfig):
     
     def ready(self):
         import objectifs.signals  # <- important pour activer le signal
+        import objectifs.checks  # noqa: F401  pragmas SQLite (check --database)
 
@@ -0,0 +1,108 @@
+from collections import Counter
+from functools import partial
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+DUREE_DONNEES = 24 * 3600
+# Changée par les traitements de masse (recalcul, clôture) : tout expire
+CLE_GENERATION = 'objectifs:stagiaire:generation'
+
+_statistiques = Counter()
+_verrou = threading.Lock()
+
+
+def _cle_version(stagiaire_id):
+    return f'objectifs:stagiaire:{stagiaire_id}:version'
+
+
+def _nouvelle_version():
+    # Jamais réutilisée, même si la clé de version a été évincée du cache
+    return time.time_ns()
+
+
+def _incrementer(cles):
+    for cle in cles:
+        try:
+            cache.incr(cle)
+        except ValueError:
+            cache.set(cle, _nouvelle_version(), None)
+
+
+def _invalider(cles):
+    if transaction.get_connection().in_atomic_block:
+        _incrementer(cles)
+    transaction.on_commit(partial(_incrementer, cles))
+
+
+def invalider_stagiaires(ids):
+    """
+    Change la version des stagiaires donnés : leurs données en cache ne
+    seront plus servies.
+
+    Dans une transaction, la version change tout de suite (lectures de la
+    transaction) et à nouveau au commit, pour écarter ce qu'un lecteur
+    concurrent aurait mis en cache avant le commit.
+    """
+    cles = [_cle_version(stagiaire_id) for stagiaire_id in set(ids) - {None}]
+    if cles:
+        _invalider(cles)
+
+
+def invalider_stagiaire(stagiaire_id):
+    invalider_stagiaires([stagiaire_id])
+
+
+def invalider_tout():
+    """Expire les données de tous les stagiaires (une seule clé modifiée)"""
+    _invalider([CLE_GENERATION])
+
+
+def donnees_en_cache(nom, profil, calculer, suffixe=''):
+    """
+    Retourne ``calculer()`` mis en cache pour ce stagiaire et sa version
+    courante : un seul aller-retour (get_many) quand la donnée est à jour.
+
+    La clé contient la date de création du profil, pour qu'une base
+    réinitialisée ne serve pas les données d'un ancien profil de même id.
+    """
+    cle = f'objectifs:{nom}:{profil.pk}:{profil.date_creation.timestamp()}:{suffixe}'
+    cles_version = [CLE_GENERATION, _cle_version(profil.pk)]
+    trouve = cache.get_many([*cles_version, cle])
+    version = tuple(trouve.get(cle_version) for cle_version in cles_version)
+    entree = trouve.get(cle)
+
+    if entree is not None and None not in version and entree[0] == version:
+        _compter(nom, 'hits')
+        return entree[1]
+
+    _compter(nom, 'misses')
+    if None in version:
+        for cle_version in cles_version:
+            cache.add(cle_version, _nouvelle_version(), None)
+        version = tuple(cache.get(cle_version) for cle_version in cles_version)
+    donnees = calculer()
+    cache.set(cle, (version, donnees), DUREE_DONNEES)
+    return donnees
+
+
+def _compter(nom, resultat):
+    with _verrou:
+        _statistiques[nom, resultat] += 1
+
+
+def statistiques_cache():
+    """Succès / échecs par type de donnée depuis le démarrage du processus"""
+    with _verrou:
+        copie = dict(_statistiques)
+    noms = sorted({nom for nom, _ in copie})
+    return {
+        nom: {
+            'hits': copie.get((nom, 'hits'), 0),
+            'misses': copie.get((nom, 'misses'), 0),
+        }
+        for nom in noms
+    }
@@ -0,0 +1,63 @@
+from datetime import date, timedelta
+from functools import lru_cache
+
+
+# Les semaines sont identifiées par (année ISO, numéro de semaine ISO) :
+# du 29 décembre au 3 janvier, l'année ISO peut différer de l'année civile.
+
+
+def semaine_iso(jour):
+    """Retourne (année ISO, semaine ISO) du jour donné"""
+    iso = jour.isocalendar()
+    return iso[0], iso[1]
+
+
+@lru_cache(maxsize=None)
+def date_iso(annee, numero_semaine, jour=1):
+    """
+    Date du jour ISO (1 = lundi) de la semaine donnée.
+
+    Contrairement à date.fromisocalendar, une semaine 53 inexistante
+    déborde sur la semaine 1 suivante au lieu de lever une erreur.
+    """
+    # Le 4 janvier appartient toujours à la semaine 1
+    quatre_janvier = date(annee, 1, 4)
+    lundi_semaine_1 = quatre_janvier - timedelta(days=quatre_janvier.weekday())
+    return lundi_semaine_1 + timedelta(weeks=numero_semaine - 1, days=jour - 1)
+
+
+def bornes_semaine(annee, numero_semaine):
+    """Retourne (lundi, samedi) de la semaine ISO"""
+    return date_iso(annee, numero_semaine, 1), date_iso(annee, numero_semaine, 6)
+
+
+@lru_cache(maxsize=None)
+def bornes_mois(annee, mois):
+    """Retourne (premier jour, dernier jour) du mois"""
+    if mois == 12:
+        return date(annee, 12, 1), date(annee, 12, 31)
+    return date(annee, mois, 1), date(annee, mois + 1, 1) - timedelta(days=1)
+
+
+def trimestre_du_mois(mois):
+    return (mois - 1) // 3 + 1
+
+
+def mois_du_trimestre(trimestre):
+    return [(trimestre - 1) * 3 + i for i in range(1, 4)]
+
+
+@lru_cache(maxsize=None)
+def bornes_trimestre(annee, trimestre):
+    """Retourne (premier jour, dernier jour) du trimestre"""
+    premier_mois, *_, dernier_mois = mois_du_trimestre(trimestre)
+    return bornes_mois(annee, premier_mois)[0], bornes_mois(annee, dernier_mois)[1]
+
+
+@lru_cache(maxsize=None)
+def mois_de_la_semaine(annee, numero_semaine):
+    """Retourne les (année, mois) civils touchés par la semaine ISO (lundi → dimanche)"""
+    lundi = date_iso(annee, numero_semaine, 1)
+    dimanche = date_iso(annee, numero_semaine, 7)
+    return tuple(sorted({(lundi.year, lundi.month), (dimanche.year, dimanche.month)}))
+
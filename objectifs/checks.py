@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.checks import Info, Tags, Warning, register
+from django.db import connections
+
+
+def pragmas_effectifs(alias='default'):
+    """Valeurs réellement appliquées sur la connexion ``alias`` (SQLite)"""
+    connexion = connections[alias]
+    valeurs = {}
+    with connexion.cursor() as cursor:
+        for pragma in settings.SQLITE_PRAGMAS:
+            cursor.execute(f'PRAGMA {pragma}')
+            ligne = cursor.fetchone()
+            valeurs[pragma] = ligne[0] if ligne else None
+    return valeurs
+
+
+@register(Tags.database)
+def verifier_sqlite(app_configs, databases=None, **kwargs):
+    """
+    Rapporte les pragmas effectifs de chaque base SQLite et signale, en
+    profil production, ceux qui diffèrent de SQLITE_PRAGMAS.
+
+    Lancé par migrate ou par ``manage.py check --database default``.
+    """
+    messages = []
+    production = getattr(settings, 'DB_PROFILE', None) == 'production'
+    for alias in databases or []:
+        connexion = connections[alias]
+        if connexion.vendor != 'sqlite':
+            continue
+        valeurs = pragmas_effectifs(alias)
+        messages.append(Info(
+            f"Base '{alias}' (profil {settings.DB_PROFILE}) : "
+            + ', '.join(f'{pragma}={valeur}' for pragma, valeur in valeurs.items()),
+            id='objectifs.I001',
+        ))
+        if not production:
+            continue
+        for pragma, attendu in settings.SQLITE_PRAGMAS.items():
+            if str(valeurs[pragma]).lower() != str(attendu).lower():
+                messages.append(Warning(
+                    f"Base '{alias}' : PRAGMA {pragma}={valeurs[pragma]} au lieu de {attendu}",
+                    hint="Vérifier OPTIONS['init_command'] et que le fichier n'est pas en lecture seule.",
+                    id='objectifs.W001',
+                ))
+        if not connexion.settings_dict.get('CONN_MAX_AGE'):
+            messages.append(Warning(
+                f"Base '{alias}' : CONN_MAX_AGE vaut 0, une connexion est ouverte par requête",
+                id='objectifs.W002',
+            ))
+    return messages
@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ProfilStagiaire
+from .cache_stagiaire import invalider_tout
+
+
+# (nom du passage, queryset des profils concernés, nouveau statut)
+TRANSITIONS = [
+    ('termines', ProfilStagiaire.objects.expires, 'termine'),
+    ('demarres', ProfilStagiaire.objects.a_demarrer, 'actif'),
+    ('reportes', ProfilStagiaire.objects.pas_commences, 'a_venir'),
+]
+
+
+@transaction.atomic
+def actualiser_statuts(today=None, dry_run=False):
+    """
+    Aligne le statut des profils sur les dates de stage, en un UPDATE par
+    transition : actif / à venir -> terminé une fois la fin passée, à venir
+    -> actif au début du stage, actif -> à venir avant le début.
+
+    Les statuts posés à la main (inactif, suspendu) et les stages terminés
+    ne sont pas touchés. Retourne le nombre de profils par transition.
+    """
+    if today is None:
+        today = timezone.now().date()
+    maintenant = timezone.now()
+
+    resultat = {}
+    for nom, profils, statut in TRANSITIONS:
+        profils = profils(today)
+        if dry_run:
+            resultat[nom] = profils.count()
+        else:
+            resultat[nom] = profils.update(statut=statut, date_modification=maintenant)
+
+    if not dry_run and any(resultat.values()):
+        invalider_tout()
+    return resultat
@@ -0,0 +1,363 @@
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+import calendar
+import hashlib
+
+from django.db.models import (
+    Sum, Count, Avg, Q, F, Value, Case, When, Subquery, OuterRef,
+    DecimalField, FloatField, ExpressionWrapper,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ProfilStagiaire, Tache, Semaine, SalaireMensuel, Evaluation
+from .calendrier import semaine_iso, bornes_semaine, bornes_mois, bornes_trimestre, trimestre_du_mois
+from .saisies import totaux_saisies
+
+
+JOURS = [jour for jour, _ in Tache.JOUR_SEMAINE_CHOICES]
+JOURS_LABELS = dict(Tache.JOUR_SEMAINE_CHOICES)
+
+# Champs affichés dans une colonne du tableau de la semaine
+CHAMPS_COLONNE = (
+    'id', 'titre', 'description', 'remarques', 'heures_estimees', 'heures_effectuees', 'est_terminee',
+)
+
+
+def version_colonne(taches):
+    """
+    Empreinte du contenu affiché d'une journée : sert de clé au fragment
+    mis en cache, qui n'est re-rendu que si l'une de ses tâches change.
+    """
+    contenu = repr([tuple(getattr(tache, champ) for champ in CHAMPS_COLONNE) for tache in taches])
+    return hashlib.sha1(contenu.encode()).hexdigest()[:16]
+
+
+def construire_snapshot(profil, today=None):
+    """
+    Calcule toutes les statistiques du dashboard d'un stagiaire.
+
+    Le nombre de requêtes est fixe (tâches de la semaine, un agrégat
+    conditionnel mois/trimestre, dernière évaluation, lignes Semaine et
+    SalaireMensuel), quel que soit le nombre de tâches du stagiaire.
+    Aucune écriture n'est faite : les lignes absentes restent absentes.
+    """
+    if today is None:
+        today = timezone.now().date()
+    # Année ISO de la semaine (différente de l'année civile fin décembre / début janvier)
+    current_year, current_week = semaine_iso(today)
+    current_month = today.month
+    semaine_debut, semaine_fin = bornes_semaine(current_year, current_week)  # Lundi → samedi
+
+    # Requête 1 : tâches de la semaine, réparties par jour en mémoire
+    taches_par_jour = {jour: [] for jour in JOURS}
+    heures_par_jour = {jour: Decimal("0") for jour in JOURS}
+    total_taches = 0
+    taches_completees = 0
+
+    taches_semaine = Tache.objects.filter(
+        stagiaire=profil,
+        semaine_numero=current_week,
+        annee=current_year
+    ).order_by('jour_semaine', '-priorite')
+
+    for tache in taches_semaine:
+        total_taches += 1
+        if tache.est_terminee:
+            taches_completees += 1
+        if tache.jour_semaine in taches_par_jour:
+            taches_par_jour[tache.jour_semaine].append(tache)
+            heures_par_jour[tache.jour_semaine] += tache.heures_effectuees
+
+    heures_semaine = sum(heures_par_jour.values(), Decimal("0"))
+    colonnes = [
+        {
+            'jour': jour,
+            'libelle': JOURS_LABELS[jour],
+            'heures': heures_par_jour[jour],
+            'taches': taches_par_jour[jour],
+            'version': version_colonne(taches_par_jour[jour]),
+        }
+        for jour in JOURS
+    ]
+
+    # Requête 2 : heures du mois et du trimestre en un seul agrégat
+    trimestre = trimestre_du_mois(current_month)
+
+    totaux = Tache.objects.filter(
+        stagiaire=profil,
+        date_jour__range=bornes_trimestre(today.year, trimestre)
+    ).aggregate(
+        heures_mois=Sum('heures_effectuees', filter=Q(date_jour__range=bornes_mois(today.year, current_month))),
+        heures_trimestre=Sum('heures_effectuees'),
+    )
+    heures_mois = totaux['heures_mois'] or Decimal("0")
+    heures_trimestre = totaux['heures_trimestre'] or Decimal("0")
+
+    # Requête 3 : dernière évaluation
+    derniere_eval = Evaluation.objects.filter(stagiaire=profil).first()
+
+    # Requêtes 4 et 5 : lignes de totaux maintenues à l'écriture (lecture seule)
+    semaine_actuelle = Semaine.objects.filter(
+        stagiaire=profil,
+        numero_semaine=current_week,
+        annee=current_year
+    ).first()
+    salaire_mensuel = SalaireMensuel.objects.filter(
+        stagiaire=profil,
+        mois=current_month,
+        annee=today.year
+    ).first()
+
+    taux_horaire = profil.taux_horaire
+    return {
+        'jours': JOURS,
+        'jours_labels': JOURS_LABELS,
+        'taches_par_jour': taches_par_jour,
+        'heures_par_jour': heures_par_jour,
+        'colonnes': colonnes,
+
+        # Stats semaine
+        'heures_semaine': heures_semaine,
+        'taches_semaine': total_taches,
+        'taches_completees': taches_completees,
+        'taches_en_cours': total_taches - taches_completees,
+        'progression': (taches_completees / total_taches * 100) if total_taches > 0 else 0,
+        'semaine_actuelle': semaine_actuelle,
+        'salaire_semaine': heures_semaine * taux_horaire,
+
+        # Stats mois
+        'heures_mois': heures_mois,
+        'salaire_mensuel': salaire_mensuel,
+        'salaire_mois': salaire_mensuel.salaire_net if salaire_mensuel else heures_mois * taux_horaire,
+        'mois': current_month,
+        'mois_nom': calendar.month_name[current_month],
+
+        # Stats trimestre
+        'heures_trimestre': heures_trimestre,
+        'salaire_trimestre': heures_trimestre * taux_horaire,
+        'trimestre': trimestre,
+        'trimestre_label': f'T{trimestre} {today.year}',
+
+        # Infos semaine
+        'semaine_numero': current_week,
+        'annee': current_year,
+        'date_debut': semaine_debut,
+        'date_fin': semaine_fin,
+
+        # Évaluation
+        'derniere_eval': derniere_eval,
+
+        # Dates
+        'today': today,
+    }
+
+
+# Tris proposés au tuteur : clé du paramètre GET → annotation
+TRIS_COHORTE = {
+    'progression': 'progression',
+    'heures': 'heures_semaine',
+    'note': 'note_moyenne',
+}
+# Tris sur une colonne nullable : les profils sans valeur viennent en bas de
+# classement (en tête en ordre croissant, en fin en ordre décroissant), ce
+# qui suit l'ordre de l'index (tuteur, note_moyenne)
+TRIS_NULLABLES = {'note_moyenne'}
+TAILLE_PAGE_COHORTE = 25
+
+
+def annoter_cohorte(stagiaires, annee, numero_semaine):
+    """
+    Ajoute à chaque profil ses compteurs de tâches, sa progression et ses
+    heures de la semaine, par sous-requêtes (une seule requête au total).
+    """
+    taches = Tache.objects.filter(stagiaire=OuterRef('pk')).order_by().values('stagiaire')
+    semaine = Semaine.objects.filter(
+        stagiaire=OuterRef('pk'),
+        annee=annee,
+        numero_semaine=numero_semaine
+    ).values('heures_totales')
+
+    return stagiaires.select_related('user').annotate(
+        taches_total=Coalesce(
+            Subquery(taches.annotate(n=Count('pk')).values('n')), 0
+        ),
+        taches_terminees=Coalesce(
+            Subquery(taches.filter(est_terminee=True).annotate(n=Count('pk')).values('n')), 0
+        ),
+        heures_semaine=Coalesce(
+            Subquery(semaine), Value(Decimal("0")),
+            output_field=DecimalField(max_digits=6, decimal_places=2)
+        ),
+    ).annotate(
+        progression=Case(
+            When(taches_total__gt=0, then=ExpressionWrapper(
+                F('taches_terminees') * 100.0 / F('taches_total'),
+                output_field=FloatField()
+            )),
+            default=Value(0.0),
+            output_field=FloatField()
+        ),
+    )
+
+
+def _lire_curseur(curseur, champ):
+    """Décode un curseur « valeur:id » ; None s'il est absent ou invalide"""
+    if not curseur:
+        return None
+    valeur, _, pk = curseur.rpartition(':')
+    try:
+        if valeur == 'None' and champ in TRIS_NULLABLES:
+            valeur = None
+        else:
+            valeur = float(valeur) if champ == 'progression' else Decimal(valeur)
+        return valeur, int(pk)
+    except (ValueError, InvalidOperation):
+        return None
+
+
+def _apres_curseur(champ, valeur, pk, decroissant):
+    """Lignes strictement après (valeur, pk) dans l'ordre de tri, NULL compris"""
+    sens = 'lt' if decroissant else 'gt'
+    if champ not in TRIS_NULLABLES:
+        return Q(**{f'{champ}__{sens}': valeur}) | Q(**{champ: valeur, f'pk__{sens}': pk})
+    if valeur is None:
+        # Croissant : les NULL d'abord, puis toutes les valeurs
+        suite = Q(**{f'{champ}__isnull': True, f'pk__{sens}': pk})
+        return suite if decroissant else suite | Q(**{f'{champ}__isnull': False})
+    suite = Q(**{f'{champ}__{sens}': valeur}) | Q(**{champ: valeur, f'pk__{sens}': pk})
+    return suite | Q(**{f'{champ}__isnull': True}) if decroissant else suite
+
+
+def _ordre_cohorte(champ, decroissant):
+    if decroissant:
+        return [F(champ).desc(nulls_last=True), F('pk').desc()]
+    return [F(champ).asc(nulls_first=True), F('pk').asc()]
+
+
+def page_cohorte(tuteur, tri='progression', statut=None, apres=None,
+                 taille=TAILLE_PAGE_COHORTE, today=None):
+    """
+    Page des stagiaires d'un tuteur, paginée par curseur (keyset) :
+    on reprend après le dernier (valeur de tri, id) affiché, sans OFFSET.
+
+    `tri` vaut une clé de TRIS_COHORTE, préfixée de « - » pour un ordre
+    décroissant. Aucune écriture n'est faite.
+    """
+    if today is None:
+        today = timezone.now().date()
+    annee, numero_semaine = semaine_iso(today)
+
+    decroissant = tri.startswith('-')
+    cle = tri.lstrip('-')
+    if cle not in TRIS_COHORTE:
+        cle, decroissant = 'progression', False
+    champ = TRIS_COHORTE[cle]
+
+    stagiaires = ProfilStagiaire.objects.filter(tuteur=tuteur)
+    if statut:
+        stagiaires = stagiaires.filter(statut=statut)
+    stagiaires = annoter_cohorte(stagiaires, annee, numero_semaine)
+
+    position = _lire_curseur(apres, champ)
+    if position:
+        stagiaires = stagiaires.filter(_apres_curseur(champ, *position, decroissant))
+
+    stagiaires = stagiaires.order_by(*_ordre_cohorte(champ, decroissant))
+
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    lignes = list(stagiaires[:taille + 1])
+    suivant = None
+    if len(lignes) > taille:
+        lignes = lignes[:taille]
+        dernier = lignes[-1]
+        suivant = f"{getattr(dernier, champ)}:{dernier.pk}"
+
+    return {
+        'stagiaires': lignes,
+        'page_suivante': suivant,
+        'tri': f"-{cle}" if decroissant else cle,
+        'statut': statut or '',
+        'semaine_numero': numero_semaine,
+        'annee': annee,
+    }
+
+
+TAILLE_PAGE_HISTORIQUE = 20
+
+
+def stats_historique(profil):
+    """Totaux de toutes les semaines du stagiaire en une seule agrégation"""
+    stats = Semaine.objects.filter(stagiaire=profil).aggregate(
+        total_heures=Sum('heures_totales'),
+        total_salaire=Sum('salaire_calcule'),
+        moyenne_heures=Avg('heures_totales'),
+    )
+    return {
+        'total_heures': stats['total_heures'] or 0,
+        'total_salaire': stats['total_salaire'] or 0,
+        'moyenne_heures': round(stats['moyenne_heures'] or 0, 2),
+    }
+
+
+def page_historique(profil, avant=None, taille=TAILLE_PAGE_HISTORIQUE):
+    """
+    Semaines du stagiaire, de la plus récente à la plus ancienne, paginées
+    par curseur « annee-numero » : la page suivante commence strictement
+    avant la dernière semaine affichée (index stagiaire, annee, numero_semaine).
+    """
+    semaines = Semaine.objects.filter(stagiaire=profil).order_by('-annee', '-numero_semaine')
+
+    if avant:
+        annee, _, numero = avant.partition('-')
+        if annee.isdigit() and numero.isdigit():
+            annee, numero = int(annee), int(numero)
+            semaines = semaines.filter(Q(annee__lt=annee) | Q(annee=annee, numero_semaine__lt=numero))
+
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    lignes = list(semaines[:taille + 1])
+    suivant = None
+    if len(lignes) > taille:
+        lignes = lignes[:taille]
+        suivant = f"{lignes[-1].annee}-{lignes[-1].numero_semaine}"
+
+    # Jours de saisie lus dans le journal : un GROUP BY pour toute la page
+    if lignes:
+        journal = totaux_saisies(
+            profil,
+            min(semaine.date_debut for semaine in lignes),
+            max(semaine.date_debut for semaine in lignes) + timedelta(days=6),
+        )
+        for semaine in lignes:
+            fin = semaine.date_debut + timedelta(days=6)
+            semaine.saisies_jours = [
+                (jour, heures) for jour, heures in sorted(journal.items())
+                if semaine.date_debut <= jour <= fin and heures
+            ]
+
+    return {
+        'semaines': lignes,
+        'page_suivante': suivant,
+    }
+
+
+def semaine_en_json(semaine):
+    """Représentation JSON d'une semaine (montants en chaînes décimales exactes)"""
+    return {
+        'id': semaine.id,
+        'numero_semaine': semaine.numero_semaine,
+        'annee': semaine.annee,
+        'date_debut': semaine.date_debut.isoformat(),
+        'date_fin': semaine.date_fin.isoformat(),
+        'heures_totales': str(semaine.heures_totales),
+        'nombre_taches': semaine.nombre_taches,
+        'taches_completees': semaine.taches_completees,
+        'taux_completion': semaine.taux_completion,
+        'salaire_calcule': str(semaine.salaire_calcule),
+        'evaluation_tuteur': semaine.evaluation_tuteur,
+        'commentaire_stagiaire': semaine.commentaire_stagiaire,
+        'commentaire_tuteur': semaine.commentaire_tuteur,
+        'saisies_jours': {
+            jour.isoformat(): f'{heures:.2f}' for jour, heures in getattr(semaine, 'saisies_jours', [])
+        },
+    }
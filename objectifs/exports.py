@@ -0,0 +1,81 @@
+import csv
+import json
+
+from .models import SalaireMensuel
+
+
+TAILLE_CHUNK = 2000
+
+COLONNES_PAIE = [
+    'stagiaire', 'nom', 'mois', 'annee', 'heures_totales', 'salaire_brut',
+    'bonus', 'deductions', 'salaire_net', 'est_paye', 'date_paiement',
+]
+
+
+def salaires_a_exporter(mois=None, annee=None, est_paye=None, tuteur=None):
+    """Fiches de paie filtrées, utilisateur chargé dans la même requête"""
+    salaires = SalaireMensuel.objects.select_related('stagiaire__user')
+    if mois is not None:
+        salaires = salaires.filter(mois=mois)
+    if annee is not None:
+        salaires = salaires.filter(annee=annee)
+    if est_paye is not None:
+        salaires = salaires.filter(est_paye=est_paye)
+    if tuteur is not None:
+        salaires = salaires.filter(stagiaire__tuteur=tuteur)
+    # Ordre stable d'un export à l'autre
+    return salaires.order_by('annee', 'mois', 'stagiaire__user__username', 'pk')
+
+
+def _montant(valeur):
+    """Montant décimal exact, sans passer par float"""
+    return f"{valeur:.2f}"
+
+
+def lignes_paie(salaires, chunk_size=TAILLE_CHUNK):
+    """Une ligne (dict de chaînes) par fiche, lue par paquets de ``chunk_size``"""
+    for salaire in salaires.iterator(chunk_size=chunk_size):
+        user = salaire.stagiaire.user
+        yield {
+            'stagiaire': user.username,
+            'nom': user.get_full_name() or user.username,
+            'mois': salaire.mois,
+            'annee': salaire.annee,
+            'heures_totales': _montant(salaire.heures_totales),
+            'salaire_brut': _montant(salaire.salaire_brut),
+            'bonus': _montant(salaire.bonus),
+            'deductions': _montant(salaire.deductions),
+            'salaire_net': _montant(salaire.salaire_net),
+            'est_paye': salaire.est_paye,
+            'date_paiement': salaire.date_paiement.isoformat() if salaire.date_paiement else '',
+        }
+
+
+class _Tampon:
+    """Pseudo-fichier pour csv.writer : retourne la ligne au lieu de la stocker"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def flux_csv(salaires, chunk_size=TAILLE_CHUNK):
+    """Génère l'export CSV ligne par ligne (en-tête compris)"""
+    writer = csv.writer(_Tampon())
+    yield writer.writerow(COLONNES_PAIE)
+    for ligne in lignes_paie(salaires, chunk_size):
+        yield writer.writerow([
+            int(ligne['est_paye']) if champ == 'est_paye' else ligne[champ]
+            for champ in COLONNES_PAIE
+        ])
+
+
+def flux_jsonl(salaires, chunk_size=TAILLE_CHUNK):
+    """Génère l'export JSON Lines : un objet par fiche, montants en chaînes"""
+    for ligne in lignes_paie(salaires, chunk_size):
+        yield json.dumps(ligne, ensure_ascii=False) + "\n"
+
+
+FORMATS = {
+    'csv': (flux_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (flux_jsonl, 'application/x-ndjson; charset=utf-8'),
+}
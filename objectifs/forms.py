@@ -0,0 +1,50 @@
+from datetime import date
+
+from django import forms
+
+from .models import Tache, ProfilStagiaire
+
+
+class TacheForm(forms.ModelForm):
+    """Validation d'une tâche saisie par le stagiaire (création ou modification)"""
+
+    class Meta:
+        model = Tache
+        fields = [
+            'titre', 'description', 'jour_semaine', 'priorite',
+            'heures_estimees', 'heures_effectuees', 'remarques',
+            'semaine_numero', 'annee', 'est_terminee',
+        ]
+
+    def clean(self):
+        donnees = super().clean()
+        annee, numero = donnees.get('annee'), donnees.get('semaine_numero')
+        if annee is not None and numero is not None:
+            # La semaine 53 n'existe pas toutes les années ISO : sans cette
+            # vérification, date_iso la ferait déborder sur la semaine 1 suivante
+            try:
+                lundi = date.fromisocalendar(annee, numero, 1)
+            except ValueError:
+                lundi = None
+            if lundi is None or lundi.isocalendar()[:2] != (annee, numero):
+                self.add_error('semaine_numero', f"La semaine {numero} n'existe pas en {annee}")
+        return donnees
+
+
+class ProfilCohorteForm(forms.ModelForm):
+    """Validation d'une ligne de cohorte importée (profil seul, sans le compte)"""
+
+    class Meta:
+        model = ProfilStagiaire
+        fields = [
+            'date_debut_stage', 'date_fin_stage', 'etablissement', 'diplome_prepare',
+            'niveau_etude', 'domaine_specialisation', 'telephone', 'ville', 'pays',
+            'taux_horaire', 'heures_hebdomadaires',
+        ]
+
+    def clean(self):
+        donnees = super().clean()
+        debut, fin = donnees.get('date_debut_stage'), donnees.get('date_fin_stage')
+        if debut and fin and fin < debut:
+            self.add_error('date_fin_stage', "La fin du stage précède son début")
+        return donnees
@@ -0,0 +1,244 @@
+import csv
+import json
+import secrets
+from datetime import timedelta
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .forms import ProfilCohorteForm
+from .models import ProfilStagiaire
+
+
+ROLES = ('stagiaire', 'tuteur', 'personnel')
+# Le rôle tuteur est enregistré par l'appartenance à ce groupe
+GROUPE_TUTEURS = 'Tuteurs'
+FORMATS = ('csv', 'jsonl')
+TAILLE_LOT = 500
+DUREE_STAGE_DEFAUT = 90  # jours, profil créé sans dates connues
+
+CHAMPS_COMPTE = ['username', 'email', 'first_name', 'last_name']
+CHAMPS_PROFIL = ProfilCohorteForm._meta.fields
+# Champs du compte laissés à leur valeur par défaut lors de la validation
+CHAMPS_NON_VALIDES = ['password', 'last_login', 'date_joined']
+
+
+class HasheurJetonInitial(PBKDF2PasswordHasher):
+    """
+    PBKDF2 allégé pour les jetons initiaux, aléatoires (128 bits) et à usage
+    unique : hacher une cohorte ne coûte plus ~0,3 s par compte. N'étant pas
+    le hasheur préféré, Django re-hache le mot de passe à la première
+    connexion réussie.
+    """
+    algorithm = 'pbkdf2_sha256_jeton'
+    iterations = 1000
+
+
+def groupe_tuteurs():
+    groupe, _ = Group.objects.get_or_create(name=GROUPE_TUTEURS)
+    return groupe
+
+
+def role_compte(user):
+    """
+    Rôle enregistré d'un compte : 'personnel' pour l'équipe et les
+    administrateurs, 'tuteur' pour les membres du groupe Tuteurs,
+    'stagiaire' pour les autres.
+    """
+    if user.is_staff or user.is_superuser:
+        return 'personnel'
+    if user.pk is not None and user.groups.filter(name=GROUPE_TUTEURS).exists():
+        return 'tuteur'
+    return 'stagiaire'
+
+
+def profil_par_defaut(user, today=None):
+    """Profil d'un stagiaire créé sans import : stage de DUREE_STAGE_DEFAUT jours"""
+    if today is None:
+        today = timezone.now().date()
+    return ProfilStagiaire(
+        user=user,
+        date_debut_stage=today,
+        date_fin_stage=today + timedelta(days=DUREE_STAGE_DEFAUT),
+    )
+
+
+def _a_des_donnees(profil):
+    return any(
+        relation.exists()
+        for relation in (profil.taches, profil.saisies_heures, profil.semaines,
+                         profil.salaires_mensuels, profil.evaluations)
+    )
+
+
+def synchroniser_profil(user):
+    """
+    Aligne le profil stagiaire sur le rôle enregistré : créé pour un compte
+    stagiaire qui n'en a pas, retiré d'un compte devenu tuteur ou personnel
+    tant qu'il ne porte aucune donnée (un ancien stagiaire garde son suivi).
+    """
+    profil = ProfilStagiaire.objects.filter(user=user).first()
+    if role_compte(user) == 'stagiaire':
+        if profil is None:
+            profil_par_defaut(user).save()
+    elif profil is not None and not _a_des_donnees(profil):
+        profil.delete()
+
+
+def lire_cohorte(fichier, format='csv'):
+    """
+    Lignes d'un fichier texte de cohorte (CSV avec en-tête, ou JSON Lines),
+    en dicts dont les valeurs vides sont retirées.
+    """
+    if format == 'jsonl':
+        lignes = (json.loads(ligne) for ligne in fichier if ligne.strip())
+    else:
+        lignes = csv.DictReader(fichier)
+    return [
+        {
+            cle.strip(): valeur.strip() if isinstance(valeur, str) else valeur
+            for cle, valeur in ligne.items()
+            if cle and valeur not in (None, '')
+        }
+        for ligne in lignes
+    ]
+
+
+def _donnees_profil(ligne):
+    # Valeurs par défaut du modèle pour les colonnes absentes du fichier
+    donnees = {
+        champ: ProfilStagiaire._meta.get_field(champ).get_default()
+        for champ in CHAMPS_PROFIL
+    }
+    donnees.update({champ: ligne[champ] for champ in CHAMPS_PROFIL if champ in ligne})
+    return donnees
+
+
+def valider_cohorte(lignes):
+    """
+    Valide toutes les lignes sans rien écrire : identifiants déjà pris et
+    tuteurs sont vérifiés en une requête chacun, pour tout le fichier.
+
+    Retourne (plan, erreurs) : ``plan`` liste les (compte, rôle, profil ou
+    None, identifiant du tuteur) valides, ``erreurs`` une entrée par ligne invalide.
+    """
+    identifiants = {ligne.get('username') for ligne in lignes} - {None}
+    pris = set(User.objects.filter(username__in=identifiants).values_list('username', flat=True))
+    references = {ligne.get('tuteur') for ligne in lignes} - {None}
+    tuteurs_existants = set(User.objects.filter(username__in=references).values_list('username', flat=True))
+
+    today = timezone.now().date()
+    plan, erreurs, vus = [], [], set()
+    for index, ligne in enumerate(lignes):
+        problemes = {}
+        role = ligne.get('role', 'stagiaire')
+        if role not in ROLES:
+            problemes['role'] = [f"Rôle attendu parmi : {', '.join(ROLES)}"]
+
+        user = User(
+            **{champ: ligne.get(champ, '') for champ in CHAMPS_COMPTE},
+            is_staff=role == 'personnel',
+        )
+        try:
+            user.clean_fields(exclude=CHAMPS_NON_VALIDES)
+        except ValidationError as erreur:
+            problemes.update(erreur.message_dict)
+        if user.username in pris:
+            problemes.setdefault('username', []).append("Identifiant déjà utilisé")
+        elif user.username in vus:
+            problemes.setdefault('username', []).append("Identifiant présent plusieurs fois dans le fichier")
+        vus.add(user.username)
+
+        tuteur = ligne.get('tuteur')
+        if tuteur is not None and tuteur not in tuteurs_existants and tuteur not in identifiants:
+            problemes['tuteur'] = [f"Tuteur introuvable : {tuteur}"]
+
+        profil = None
+        if role == 'stagiaire':
+            form = ProfilCohorteForm(_donnees_profil(ligne))
+            if form.is_valid():
+                profil = form.instance
+                if profil.date_debut_stage > today:
+                    # Passe à « actif » au début du stage (commande cycle_stages)
+                    profil.statut = 'a_venir'
+            else:
+                problemes.update({
+                    champ: [erreur['message'] for erreur in liste]
+                    for champ, liste in form.errors.get_json_data().items()
+                })
+
+        if problemes:
+            erreurs.append({'index': index, 'username': user.username, 'errors': problemes})
+        else:
+            plan.append((user, role, profil, tuteur))
+
+    return plan, erreurs
+
+
+@transaction.atomic
+def inscrire_cohorte(lignes, jetons=True, taille_lot=TAILLE_LOT, dry_run=False):
+    """
+    Crée les comptes, l'appartenance au groupe Tuteurs puis les profils
+    d'une cohorte par bulk_create (aucun signal par compte), les tuteurs
+    étant rattachés dans le même lot.
+
+    Tout ou rien : si une ligne est invalide, rien n'est écrit. Avec
+    ``jetons``, chaque compte reçoit un mot de passe initial aléatoire,
+    retourné en clair une seule fois ; sinon un mot de passe inutilisable.
+
+    Retourne (succès, erreurs par ligne ou résumé de l'import).
+    """
+    plan, erreurs = valider_cohorte(lignes)
+    if erreurs:
+        return False, erreurs
+
+    resume = {
+        'comptes': len(plan),
+        'profils': sum(1 for _, _, profil, _ in plan if profil is not None),
+        'jetons': [],
+    }
+    if dry_run:
+        return True, resume
+
+    hasheur = HasheurJetonInitial()
+    for user, _, _, _ in plan:
+        if jetons:
+            jeton = secrets.token_urlsafe(16)
+            user.password = make_password(jeton, hasher=hasheur)
+            resume['jetons'].append((user.username, jeton))
+        else:
+            user.set_unusable_password()
+
+    users = [user for user, _, _, _ in plan]
+    User.objects.bulk_create(users, batch_size=taille_lot)
+    if any(user.pk is None for user in users):
+        # Base sans RETURNING sur les insertions multiples : ids relus
+        ids = dict(User.objects.filter(
+            username__in=[user.username for user in users]
+        ).values_list('username', 'pk'))
+        for user in users:
+            user.pk = ids[user.username]
+
+    nouveaux_tuteurs = [user for user, role, _, _ in plan if role == 'tuteur']
+    if nouveaux_tuteurs:
+        groupe = groupe_tuteurs()
+        User.groups.through.objects.bulk_create(
+            [User.groups.through(user_id=user.pk, group_id=groupe.pk) for user in nouveaux_tuteurs],
+            batch_size=taille_lot,
+        )
+
+    references = {tuteur for _, _, _, tuteur in plan} - {None}
+    tuteurs = dict(User.objects.filter(username__in=references).values_list('username', 'pk'))
+    profils = []
+    for user, _, profil, tuteur in plan:
+        if profil is None:
+            continue
+        profil.user = user
+        profil.tuteur_id = tuteurs.get(tuteur)
+        profils.append(profil)
+    ProfilStagiaire.objects.bulk_create(profils, batch_size=taille_lot)
+
+    return True, resume
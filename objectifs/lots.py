@@ -0,0 +1,256 @@
+from functools import reduce
+import operator
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from .forms import TacheForm
+from .models import Tache, SaisieHeures, Semaine, SalaireMensuel
+from .calendrier import semaine_iso
+from .rollups import ecritures_groupees, enregistrer_ecriture, recalculer_semaines, recalculer_salaires, TAILLE_LOT
+from .saisies import saisie_corrective
+
+
+ACTIONS = ('creer', 'modifier', 'supprimer')
+TAILLE_MAX_LOT = 200
+
+CHAMPS_TACHE = TacheForm._meta.fields
+CHAMPS_DATE_JOUR = {'jour_semaine', 'semaine_numero', 'annee'}
+
+
+def champs_modifies(envoyes):
+    """
+    Colonnes à réécrire pour une modification : seulement les champs envoyés
+    (une valeur relue, comme des heures ajoutées entre-temps, n'est pas
+    écrasée), plus les champs dérivés que bulk_update ne calcule pas.
+    """
+    champs = [champ for champ in CHAMPS_TACHE if champ in envoyes]
+    if CHAMPS_DATE_JOUR & envoyes:
+        champs.append('date_jour')
+    if 'est_terminee' in envoyes:
+        champs.append('date_completion')
+    return [*champs, 'date_modification']
+
+
+def _normaliser(operation):
+    """Données de la tâche, jours et priorités acceptés par code ou libellé"""
+    donnees = {cle: valeur for cle, valeur in operation.items() if cle not in ('action', 'id')}
+    for champ, conversion in (('jour_semaine', Tache.jour_depuis), ('priorite', Tache.priorite_depuis)):
+        if champ in donnees:
+            code = conversion(donnees[champ])
+            if code is not None:
+                donnees[champ] = code
+    return donnees
+
+
+def _identifiant(operation):
+    try:
+        return int(operation.get('id'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _erreurs(form):
+    return {
+        champ: [erreur['message'] for erreur in erreurs]
+        for champ, erreurs in form.errors.get_json_data().items()
+    }
+
+
+def valider_lot(profil, operations, today=None):
+    """
+    Valide toutes les opérations du lot sans rien écrire.
+
+    Retourne (plan, resultats) : ``plan`` liste les (index, action, tâche)
+    valides, ``resultats`` contient une entrée par opération invalide.
+    """
+    if today is None:
+        today = timezone.now().date()
+    annee, numero_semaine = semaine_iso(today)
+
+    # Tâches modifiées ou supprimées : une seule requête, limitée au stagiaire
+    ids = {
+        _identifiant(operation) for operation in operations
+        if isinstance(operation, dict) and operation.get('action') in ('modifier', 'supprimer')
+    }
+    existantes = Tache.objects.filter(stagiaire=profil)
+    if transaction.get_connection().in_atomic_block:
+        # Lignes verrouillées jusqu'à l'écriture du lot (appliquer_lot)
+        existantes = existantes.select_for_update()
+    existantes = existantes.in_bulk(ids - {None})
+
+    plan, resultats, ids_vus = [], [], set()
+    for index, operation in enumerate(operations):
+        action = operation.get('action') if isinstance(operation, dict) else None
+        if action not in ACTIONS:
+            resultats.append({'index': index, 'action': action, 'success': False,
+                              'errors': {'action': [f"Action attendue parmi : {', '.join(ACTIONS)}"]}})
+            continue
+
+        if action == 'creer':
+            donnees = {
+                'semaine_numero': numero_semaine,
+                'annee': annee,
+                'priorite': Tache.PRIORITE_MOYENNE,
+                'heures_effectuees': 0,
+                **_normaliser(operation),
+            }
+            form = TacheForm(donnees, instance=Tache(stagiaire=profil))
+            if form.is_valid():
+                tache = form.instance
+                if 'est_terminee' not in operation:
+                    tache.est_terminee = tache.heures_effectuees >= tache.heures_estimees
+                plan.append((index, action, tache))
+            else:
+                resultats.append({'index': index, 'action': action, 'success': False,
+                                  'errors': _erreurs(form)})
+            continue
+
+        pk = _identifiant(operation)
+        tache = existantes.get(pk)
+        if tache is None or pk in ids_vus:
+            message = "Tâche introuvable" if tache is None else "Tâche présente plusieurs fois dans le lot"
+            resultats.append({'index': index, 'action': action, 'id': pk, 'success': False,
+                              'errors': {'id': [message]}})
+            continue
+        ids_vus.add(pk)
+
+        if action == 'supprimer':
+            plan.append((index, action, tache))
+            continue
+
+        donnees = _normaliser(operation)
+        form = TacheForm({**model_to_dict(tache, fields=CHAMPS_TACHE), **donnees}, instance=tache)
+        if form.is_valid():
+            tache._champs_envoyes = set(donnees) & set(CHAMPS_TACHE)
+            plan.append((index, action, tache))
+        else:
+            resultats.append({'index': index, 'action': action, 'id': pk, 'success': False,
+                              'errors': _erreurs(form)})
+
+    return plan, resultats
+
+
+@transaction.atomic
+def appliquer_lot(profil, operations, today=None):
+    """
+    Valide puis applique un lot de créations, modifications et suppressions
+    de tâches : un bulk_create, un bulk_update et un DELETE au plus, les
+    totaux de chaque semaine et de chaque mois touchés n'étant mis à jour
+    qu'une fois.
+
+    Tout ou rien : si une opération est invalide, rien n'est écrit.
+    Retourne (succès, résultats par opération dans l'ordre du lot).
+    """
+    plan, erreurs = valider_lot(profil, operations, today)
+    if erreurs:
+        return False, sorted(erreurs, key=lambda resultat: resultat['index'])
+
+    maintenant = timezone.now()
+    a_creer, a_modifier, a_supprimer = [], [], []
+    for _, action, tache in plan:
+        if action == 'supprimer':
+            a_supprimer.append(tache.pk)
+            continue
+        tache.date_jour = tache.calculer_date_jour()
+        if not tache.est_terminee:
+            tache.date_completion = None
+        elif tache.date_completion is None:
+            tache.date_completion = maintenant
+        if action == 'creer':
+            a_creer.append(tache)
+        else:
+            tache.date_modification = maintenant
+            a_modifier.append(tache)
+
+    with ecritures_groupees():
+        Tache.objects.bulk_create(a_creer)
+        # Un bulk_update par ensemble de champs envoyés
+        groupes = {}
+        for tache in a_modifier:
+            groupes.setdefault(frozenset(tache._champs_envoyes), []).append(tache)
+        for envoyes, taches in groupes.items():
+            Tache.objects.bulk_update(taches, champs_modifies(envoyes))
+        saisies = []
+        for tache in [*a_creer, *a_modifier]:
+            ancien, nouveau = getattr(tache, '_etat_rollup', None), tache.etat_rollup()
+            enregistrer_ecriture(ancien, nouveau)
+            saisie = saisie_corrective(ancien, nouveau, tache.pk)
+            if saisie is not None:
+                saisies.append(saisie)
+            tache._etat_rollup = nouveau
+        SaisieHeures.objects.bulk_create(saisies)
+        if a_supprimer:
+            # Les suppressions passent par les signaux, différés eux aussi
+            Tache.objects.filter(pk__in=a_supprimer).delete()
+
+    resultats = [
+        {'index': index, 'action': action, 'id': tache.pk, 'success': True}
+        for index, action, tache in plan
+    ]
+    return True, resultats
+
+
+def _par_periode(groupes):
+    """
+    Filtre des lignes (stagiaire, année, période) touchées : un terme par
+    période, avec la liste de ses stagiaires.
+    """
+    return reduce(operator.or_, (
+        Q(annee=annee, **{champ: periode}, stagiaire_id__in=stagiaires)
+        for (annee, periode, champ), stagiaires in groupes.items()
+    ))
+
+
+def changer_statut_taches(taches, terminee=True):
+    """
+    Marque un ensemble de tâches comme terminées (heures effectuées portées
+    à l'estimation) ou non terminées, en une transaction : les saisies
+    correctives du journal (bulk_create), un UPDATE des tâches, puis un
+    UPDATE des seules semaines et un des seuls salaires (non clôturés)
+    touchés, c'est-à-dire des (stagiaire, année, semaine | mois) des tâches
+    changées.
+
+    Retourne un résumé : tâches, saisies, semaines et salaires mis à jour.
+    """
+    if terminee:
+        a_changer = taches.filter(Q(est_terminee=False) | ~Q(heures_effectuees=F('heures_estimees')))
+    else:
+        a_changer = taches.filter(est_terminee=True)
+
+    with transaction.atomic():
+        # Tâches touchées, lues avant la mise à jour : groupes et saisies
+        semaines, mois = {}, {}
+        maintenant = timezone.now()
+        saisies = []
+        lignes = a_changer.order_by().values_list(
+            'pk', 'stagiaire_id', 'annee', 'semaine_numero', 'date_jour',
+            'heures_estimees', 'heures_effectuees',
+        )
+        for pk, stagiaire_id, annee, numero, date_jour, estimees, effectuees in lignes:
+            semaines.setdefault((annee, numero, 'numero_semaine'), set()).add(stagiaire_id)
+            mois.setdefault((date_jour.year, date_jour.month, 'mois'), set()).add(stagiaire_id)
+            if terminee and estimees != effectuees:
+                saisies.append(SaisieHeures(
+                    stagiaire_id=stagiaire_id, tache_id=pk, heures=estimees - effectuees, date_saisie=maintenant,
+                ))
+        if not semaines:
+            return {'taches': 0, 'saisies': 0, 'semaines': 0, 'salaires': 0}
+
+        if terminee:
+            SaisieHeures.objects.bulk_create(saisies, batch_size=TAILLE_LOT)
+            nombre = a_changer.update(
+                est_terminee=True,
+                heures_effectuees=F('heures_estimees'),
+                date_completion=maintenant,
+                date_modification=maintenant,
+            )
+        else:
+            nombre = a_changer.update(est_terminee=False, date_completion=None, date_modification=maintenant)
+
+        nombre_semaines = recalculer_semaines(Semaine.objects.filter(_par_periode(semaines)))
+        nombre_salaires = recalculer_salaires(SalaireMensuel.objects.filter(_par_periode(mois)))
+
+    return {'taches': nombre, 'saisies': len(saisies), 'semaines': nombre_semaines, 'salaires': nombre_salaires}
@@ -0,0 +1,42 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from objectifs.rollups import cloturer_mois, rouvrir_mois
+
+
+class Command(BaseCommand):
+    help = "Clôture la paie d'un mois : calcule et verrouille les salaires de tous les stagiaires actifs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--annee', type=int, help="Année (défaut : celle du mois précédent)")
+        parser.add_argument('--mois', type=int, help="Mois 1-12 (défaut : le mois précédent)")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Calculer sans rien écrire")
+        parser.add_argument('--rouvrir', action='store_true',
+                            help="Déverrouiller le mois au lieu de le clôturer")
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        precedent = today.replace(day=1) - timezone.timedelta(days=1)
+        annee = options['annee'] or precedent.year
+        mois = options['mois'] or precedent.month
+        if not 1 <= mois <= 12:
+            raise CommandError("Le mois doit être compris entre 1 et 12")
+
+        if options['rouvrir']:
+            nombre = rouvrir_mois(annee, mois)
+            self.stdout.write(self.style.SUCCESS(f"{mois:02d}/{annee} rouvert : {nombre} salaire(s) déverrouillé(s)."))
+            return
+
+        debut = perf_counter()
+        resultat = cloturer_mois(annee, mois, dry_run=options['dry_run'])
+        duree = perf_counter() - debut
+
+        prefixe = "[dry-run] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixe}{mois:02d}/{annee} : {resultat['clotures']} salaire(s) clôturé(s), "
+            f"{resultat['deja_clotures']} déjà clôturé(s), {resultat['heures']} h, "
+            f"{resultat['salaire_net']} net au total ({duree:.2f} s)."
+        ))
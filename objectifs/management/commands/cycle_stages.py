@@ -0,0 +1,33 @@
+from datetime import date
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from objectifs.cycle_stage import actualiser_statuts
+
+
+class Command(BaseCommand):
+    help = "Met à jour le statut des stagiaires selon les dates de stage (à lancer chaque nuit)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Date de référence AAAA-MM-JJ (défaut : aujourd'hui)")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Compter les changements sans rien écrire")
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError("Date attendue au format AAAA-MM-JJ")
+
+        debut = perf_counter()
+        resultat = actualiser_statuts(today, dry_run=options['dry_run'])
+        duree = perf_counter() - debut
+
+        prefixe = "[dry-run] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixe}{resultat['termines']} stage(s) terminé(s), {resultat['demarres']} démarré(s), "
+            f"{resultat['reportes']} remis à venir ({duree:.2f} s)."
+        ))
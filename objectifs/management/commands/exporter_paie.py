@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from objectifs.exports import salaires_a_exporter, FORMATS, TAILLE_CHUNK
+
+
+class Command(BaseCommand):
+    help = "Exporte les salaires mensuels en CSV ou JSON Lines, en flux"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mois', type=int, help="Limiter à un mois (1-12)")
+        parser.add_argument('--annee', type=int, help="Limiter à une année")
+        statut = parser.add_mutually_exclusive_group()
+        statut.add_argument('--paye', action='store_true', help="Seulement les salaires payés")
+        statut.add_argument('--non-paye', action='store_true', help="Seulement les salaires non payés")
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--sortie', metavar='FICHIER',
+                            help="Fichier de sortie (défaut : sortie standard)")
+        parser.add_argument('--chunk-size', type=int, default=TAILLE_CHUNK,
+                            help="Lignes lues par paquet (défaut : %(default)s)")
+
+    def handle(self, *args, **options):
+        if options['mois'] is not None and not 1 <= options['mois'] <= 12:
+            raise CommandError("Le mois doit être compris entre 1 et 12")
+
+        est_paye = True if options['paye'] else False if options['non_paye'] else None
+        salaires = salaires_a_exporter(mois=options['mois'], annee=options['annee'], est_paye=est_paye)
+        generer, _ = FORMATS[options['format']]
+
+        if not options['sortie']:
+            for morceau in generer(salaires, options['chunk_size']):
+                self.stdout.write(morceau, ending='')
+            return
+
+        lignes = 0
+        with open(options['sortie'], 'w', encoding='utf-8', newline='') as sortie:
+            for morceau in generer(salaires, options['chunk_size']):
+                sortie.write(morceau)
+                lignes += 1
+
+        if options['format'] == 'csv':
+            lignes -= 1  # en-tête
+        self.stdout.write(self.style.SUCCESS(f"{lignes} salaire(s) exporté(s) dans {options['sortie']}."))
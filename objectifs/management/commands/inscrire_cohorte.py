@@ -0,0 +1,75 @@
+import csv
+import sys
+from pathlib import Path
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from objectifs.inscriptions import inscrire_cohorte, lire_cohorte, FORMATS, TAILLE_LOT
+
+
+class Command(BaseCommand):
+    help = "Inscrit une cohorte de stagiaires (et leurs tuteurs) depuis un fichier CSV ou JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Fichier de la cohorte ('-' : entrée standard)")
+        parser.add_argument('--format', choices=FORMATS,
+                            help="Format du fichier (défaut : d'après l'extension, sinon csv)")
+        parser.add_argument('--jetons', default='-', metavar='FICHIER',
+                            help="CSV identifiant,jeton des mots de passe initiaux ('-' : sortie standard)")
+        parser.add_argument('--sans-mot-de-passe', action='store_true',
+                            help="Mots de passe inutilisables (réinitialisation par e-mail)")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Valider le fichier sans rien écrire")
+        parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT,
+                            help="Nombre de lignes insérées par lot (défaut : %(default)s)")
+
+    def handle(self, *args, **options):
+        chemin = options['fichier']
+        format = options['format'] or ('jsonl' if chemin.endswith(('.jsonl', '.ndjson')) else 'csv')
+        try:
+            if chemin == '-':
+                lignes = lire_cohorte(sys.stdin, format)
+            else:
+                with open(chemin, newline='', encoding='utf-8-sig') as fichier:
+                    lignes = lire_cohorte(fichier, format)
+        except (OSError, ValueError) as erreur:
+            raise CommandError(f"Lecture impossible : {erreur}")
+
+        debut = perf_counter()
+        succes, resultat = inscrire_cohorte(
+            lignes,
+            jetons=not options['sans_mot_de_passe'],
+            taille_lot=options['taille_lot'],
+            dry_run=options['dry_run'],
+        )
+        duree = perf_counter() - debut
+
+        if not succes:
+            for erreur in resultat:
+                details = '; '.join(
+                    f"{champ} : {' '.join(messages)}" for champ, messages in erreur['errors'].items()
+                )
+                self.stderr.write(f"Ligne {erreur['index'] + 1} ({erreur['username'] or '?'}) : {details}")
+            raise CommandError(f"{len(resultat)} ligne(s) invalide(s), rien n'a été importé.")
+
+        if resultat['jetons']:
+            self.ecrire_jetons(resultat['jetons'], options['jetons'])
+
+        prefixe = "[dry-run] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixe}{resultat['comptes']} compte(s) et {resultat['profils']} profil(s) "
+            f"stagiaire créé(s) ({duree:.2f} s)."
+        ))
+
+    def ecrire_jetons(self, jetons, destination):
+        if destination == '-':
+            writer = csv.writer(self.stdout)
+            writer.writerow(['username', 'jeton'])
+            writer.writerows(jetons)
+            return
+        with open(destination, 'w', newline='', encoding='utf-8') as fichier:
+            writer = csv.writer(fichier)
+            writer.writerow(['username', 'jeton'])
+            writer.writerows(jetons)
+        Path(destination).chmod(0o600)
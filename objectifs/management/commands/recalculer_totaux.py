@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from objectifs.rollups import recalculer_totaux, TAILLE_LOT
+from objectifs.saisies import projeter_saisies
+
+
+class Command(BaseCommand):
+    help = "Recalcule en masse les totaux des semaines et des salaires mensuels à partir des tâches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--annee', type=int, help="Limiter à une année")
+        parser.add_argument('--stagiaire', action='append', dest='stagiaires', metavar='USERNAME',
+                            help="Limiter à un stagiaire (option répétable)")
+        parser.add_argument('--tuteur', metavar='USERNAME', help="Limiter aux stagiaires d'un tuteur")
+        parser.add_argument('--saisies', action='store_true',
+                            help="Recalculer d'abord les heures des tâches à partir du journal des saisies")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Afficher les écarts sans rien écrire")
+        parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT,
+                            help="Nombre de lignes écrites par lot (défaut : %(default)s)")
+
+    def handle(self, *args, **options):
+        filtres = {}
+        if options['annee']:
+            filtres['annee'] = options['annee']
+        if options['stagiaires']:
+            filtres['stagiaire__user__username__in'] = options['stagiaires']
+        if options['tuteur']:
+            filtres['stagiaire__tuteur__username'] = options['tuteur']
+
+        if options['saisies']:
+            for tache, ancienne, nouvelle in projeter_saisies(filtres, dry_run=options['dry_run']):
+                self.stdout.write(f"Tâche {tache.pk} ({tache.titre}) : heures_effectuees {ancienne} → {nouvelle}")
+
+        resultat = recalculer_totaux(
+            filtres,
+            dry_run=options['dry_run'],
+            taille_lot=options['taille_lot'],
+        )
+
+        for libelle, champ, ancienne, nouvelle in resultat['ecarts']:
+            self.stdout.write(f"{libelle} : {champ} {ancienne} → {nouvelle}")
+
+        prefixe = "[dry-run] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixe}{resultat['semaines']} semaine(s) dont {resultat['semaines_creees']} créée(s), "
+            f"{resultat['salaires']} salaire(s) dont {resultat['salaires_crees']} créé(s), "
+            f"{len(resultat['ecarts'])} écart(s)."
+        ))
@@ -0,0 +1,50 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = "Copie la base principale SQLite vers la copie en lecture (API de sauvegarde SQLite)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replica', default=settings.REPLICA_LECTURE,
+                            help="Alias de la copie (défaut : %(default)s)")
+        parser.add_argument('--toutes', type=float, metavar='SECONDES',
+                            help="Recopier en boucle à cet intervalle au lieu d'une seule fois")
+
+    def handle(self, *args, **options):
+        alias = options['replica']
+        if alias not in settings.DATABASES:
+            raise CommandError(f"Alias '{alias}' absent de DATABASES (définir DJANGO_DB_REPLICA)")
+        source, cible = connections['default'], connections[alias]
+        if source.vendor != 'sqlite' or cible.vendor != 'sqlite':
+            raise CommandError("La synchronisation par copie ne concerne que SQLite")
+        if str(source.settings_dict['NAME']) == str(cible.settings_dict['NAME']):
+            raise CommandError("La copie pointe sur le même fichier que la base principale")
+
+        while True:
+            debut = time.monotonic()
+            pages = self.copier(source, cible.settings_dict['NAME'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{pages} page(s) copiée(s) vers '{alias}' en {time.monotonic() - debut:.2f} s."
+            ))
+            if not options['toutes']:
+                return
+            time.sleep(options['toutes'])
+
+    def copier(self, source, chemin):
+        """
+        Instantané cohérent de la principale, écrit dans la copie en une
+        transaction : les lecteurs de la copie voient l'ancien ou le nouvel
+        état, jamais un fichier à moitié écrit.
+        """
+        source.ensure_connection()
+        cible = sqlite3.connect(chemin)
+        try:
+            source.connection.backup(cible)
+            return cible.execute('PRAGMA page_count').fetchone()[0]
+        finally:
+            cible.close()
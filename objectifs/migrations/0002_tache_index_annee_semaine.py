@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:32
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objectifs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tache',
+            name='objectifs_t_stagiai_c9c4ac_idx',
+        ),
+        migrations.AlterField(
+            model_name='tache',
+            name='annee',
+            field=models.PositiveIntegerField(help_text='Année ISO de la semaine'),
+        ),
+        migrations.AlterField(
+            model_name='tache',
+            name='heures_estimees',
+            field=models.DecimalField(decimal_places=2, max_digits=5, validators=[django.core.validators.MinValueValidator(Decimal('0.10'))]),
+        ),
+        migrations.AlterField(
+            model_name='tache',
+            name='semaine_numero',
+            field=models.PositiveIntegerField(help_text='Numéro de la semaine ISO'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['stagiaire', 'annee', 'semaine_numero'], name='objectifs_t_stagiai_be25eb_idx'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:40
+
+from datetime import date, timedelta
+import logging
+
+from django.db import migrations, models
+
+
+JOURS = ['lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi']
+
+logger = logging.getLogger(__name__)
+
+
+def _lundi(annee_iso, numero_semaine):
+    quatre_janvier = date(annee_iso, 1, 4)
+    return quatre_janvier - timedelta(days=quatre_janvier.weekday()) + timedelta(weeks=numero_semaine - 1)
+
+
+def _annee_iso(annee, numero_semaine, date_creation):
+    """
+    Année ISO d'une tâche enregistrée avec l'année civile de sa création à
+    côté d'un numéro de semaine ISO : parmi les années ISO dont cette
+    semaine existe et touche l'année civile, la seule candidate, sinon
+    celle de la date de création si elle tombe sur cette semaine.
+
+    Retourne (année ISO, ambiguë).
+    """
+    candidates = [
+        annee_iso for annee_iso in (annee - 1, annee, annee + 1)
+        if numero_semaine <= date(annee_iso, 12, 28).isocalendar()[1]
+        and annee in (_lundi(annee_iso, numero_semaine).year,
+                      (_lundi(annee_iso, numero_semaine) + timedelta(days=6)).year)
+    ]
+    if len(candidates) == 1:
+        return candidates[0], False
+    if date_creation is not None:
+        creation = date_creation.date().isocalendar()
+        if creation[1] == numero_semaine and creation[0] in candidates:
+            return creation[0], False
+    return annee, True
+
+
+def remplir_date_jour(apps, schema_editor):
+    """
+    Déduit date_jour et ramène ``annee`` à l'année ISO. Les totaux Semaine et
+    SalaireMensuel existants ne sont pas réconciliés ici : lancer
+    ``manage.py recalculer_totaux`` après le déploiement si des années ont changé.
+    """
+    Tache = apps.get_model('objectifs', 'Tache')
+    taches, corrigees, ambigues = [], 0, []
+    champs = ('id', 'annee', 'semaine_numero', 'jour_semaine', 'date_creation')
+    for tache in Tache.objects.only(*champs).iterator(chunk_size=2000):
+        annee, ambigue = _annee_iso(tache.annee, tache.semaine_numero, tache.date_creation)
+        if ambigue:
+            ambigues.append(tache.pk)
+        if annee != tache.annee:
+            corrigees += 1
+            tache.annee = annee
+        jour = JOURS.index(tache.jour_semaine) if tache.jour_semaine in JOURS else 0
+        tache.date_jour = _lundi(tache.annee, tache.semaine_numero) + timedelta(days=jour)
+        taches.append(tache)
+        if len(taches) >= 2000:
+            Tache.objects.bulk_update(taches, ['annee', 'date_jour'])
+            taches = []
+    Tache.objects.bulk_update(taches, ['annee', 'date_jour'])
+
+    if ambigues:
+        logger.warning(
+            "%d tâche(s) à l'année ISO ambiguë, année conservée (ids : %s)",
+            len(ambigues), ', '.join(map(str, ambigues)),
+        )
+    if corrigees:
+        logger.warning(
+            "%d tâche(s) ramenée(s) à l'année ISO : lancer manage.py recalculer_totaux "
+            "pour réconcilier les semaines et salaires existants", corrigees,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objectifs', '0002_tache_index_annee_semaine'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tache',
+            name='date_jour',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(remplir_date_jour, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tache',
+            name='date_jour',
+            field=models.DateField(editable=False, help_text='Date du jour de la tâche, déduite de (annee, semaine_numero, jour_semaine)'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['stagiaire', 'date_jour'], name='objectifs_t_stagiai_f5f2b1_idx'),
+        ),
+    ]
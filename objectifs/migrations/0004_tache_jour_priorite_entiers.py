@@ -0,0 +1,90 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:45
+
+from django.db import migrations, models
+
+
+JOURS = ['lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi']
+PRIORITES = ['basse', 'moyenne', 'haute', 'urgente']
+
+
+def vers_entiers(apps, schema_editor):
+    Tache = apps.get_model('objectifs', 'Tache')
+    # Une instruction UPDATE par valeur, sans charger les tâches
+    for code, jour in enumerate(JOURS, start=1):
+        Tache.objects.filter(jour_semaine=jour).update(jour_semaine_code=code)
+    for code, priorite in enumerate(PRIORITES, start=1):
+        Tache.objects.filter(priorite=priorite).update(priorite_code=code)
+    Tache.objects.filter(jour_semaine_code__isnull=True).update(jour_semaine_code=1)
+    Tache.objects.filter(priorite_code__isnull=True).update(priorite_code=2)
+
+
+def vers_libelles(apps, schema_editor):
+    Tache = apps.get_model('objectifs', 'Tache')
+    for code, jour in enumerate(JOURS, start=1):
+        Tache.objects.filter(jour_semaine_code=code).update(jour_semaine=jour)
+    for code, priorite in enumerate(PRIORITES, start=1):
+        Tache.objects.filter(priorite_code=code).update(priorite=priorite)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objectifs', '0003_tache_date_jour'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tache',
+            name='objectifs_t_stagiai_be25eb_idx',
+        ),
+        migrations.AddField(
+            model_name='tache',
+            name='jour_semaine_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='tache',
+            name='priorite_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        # Nullable le temps de la conversion : au retour arrière, la colonne
+        # texte est recréée vide puis remplie par vers_libelles
+        migrations.AlterField(
+            model_name='tache',
+            name='jour_semaine',
+            field=models.CharField(choices=[('lundi', 'Lundi'), ('mardi', 'Mardi'), ('mercredi', 'Mercredi'), ('jeudi', 'Jeudi'), ('vendredi', 'Vendredi'), ('samedi', 'Samedi')], max_length=20, null=True),
+        ),
+        migrations.RunPython(vers_entiers, vers_libelles),
+        migrations.RemoveField(
+            model_name='tache',
+            name='jour_semaine',
+        ),
+        migrations.RemoveField(
+            model_name='tache',
+            name='priorite',
+        ),
+        migrations.RenameField(
+            model_name='tache',
+            old_name='jour_semaine_code',
+            new_name='jour_semaine',
+        ),
+        migrations.RenameField(
+            model_name='tache',
+            old_name='priorite_code',
+            new_name='priorite',
+        ),
+        migrations.AlterField(
+            model_name='tache',
+            name='jour_semaine',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Lundi'), (2, 'Mardi'), (3, 'Mercredi'), (4, 'Jeudi'), (5, 'Vendredi'), (6, 'Samedi')]),
+        ),
+        migrations.AlterField(
+            model_name='tache',
+            name='priorite',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Basse'), (2, 'Moyenne'), (3, 'Haute'), (4, 'Urgente')], default=2),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['stagiaire', 'annee', 'semaine_numero', 'jour_semaine', '-priorite'], name='objectifs_t_stagiai_e5f803_idx'),
+        ),
+    ]
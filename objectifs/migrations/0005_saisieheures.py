@@ -0,0 +1,60 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:44
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def journaliser_heures_existantes(apps, schema_editor):
+    """Une saisie par tâche déjà commencée, datée de sa dernière modification"""
+    Tache = apps.get_model('objectifs', 'Tache')
+    SaisieHeures = apps.get_model('objectifs', 'SaisieHeures')
+    saisies = []
+    taches = Tache.objects.exclude(heures_effectuees=0).only(
+        'id', 'stagiaire_id', 'heures_effectuees', 'date_modification'
+    )
+    for tache in taches.iterator(chunk_size=2000):
+        saisies.append(SaisieHeures(
+            stagiaire_id=tache.stagiaire_id,
+            tache_id=tache.id,
+            heures=tache.heures_effectuees,
+            date_saisie=tache.date_modification,
+        ))
+        if len(saisies) >= 2000:
+            SaisieHeures.objects.bulk_create(saisies)
+            saisies = []
+    SaisieHeures.objects.bulk_create(saisies)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objectifs', '0004_tache_jour_priorite_entiers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tache',
+            name='heures_effectuees',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text="Somme des saisies d'heures de la tâche (projection du journal)", max_digits=5, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))]),
+        ),
+        migrations.CreateModel(
+            name='SaisieHeures',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('heures', models.DecimalField(decimal_places=2, help_text='Heures ajoutées (négatives pour une correction)', max_digits=5)),
+                ('date_saisie', models.DateTimeField(default=django.utils.timezone.now)),
+                ('stagiaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saisies_heures', to='objectifs.profilstagiaire')),
+                ('tache', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saisies', to='objectifs.tache')),
+            ],
+            options={
+                'verbose_name': "Saisie d'heures",
+                'verbose_name_plural': "Saisies d'heures",
+                'ordering': ['-date_saisie'],
+                'indexes': [models.Index(fields=['stagiaire', 'date_saisie'], name='objectifs_s_stagiai_3e6291_idx')],
+            },
+        ),
+        migrations.RunPython(journaliser_heures_existantes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objectifs', '0005_saisieheures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salairemensuel',
+            name='date_cloture',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='salairemensuel',
+            name='est_cloture',
+            field=models.BooleanField(default=False, help_text='Mois clôturé : heures et salaires ne sont plus recalculés'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:50
+
+import django.db.models.expressions
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remplir_bilans(apps, schema_editor):
+    """Bilan des évaluations des stagiaires déjà évalués (tendance sur 3)"""
+    ProfilStagiaire = apps.get_model('objectifs', 'ProfilStagiaire')
+    Evaluation = apps.get_model('objectifs', 'Evaluation')
+    centime = Decimal("0.01")
+    notes = {}
+    evaluations = Evaluation.objects.order_by('stagiaire_id', '-date_evaluation', '-date_creation')
+    for stagiaire_id, type_evaluation, note in evaluations.values_list(
+            'stagiaire_id', 'type_evaluation', 'note_moyenne').iterator(chunk_size=2000):
+        notes.setdefault(stagiaire_id, []).append((type_evaluation, note))
+
+    for stagiaire_id, liste in notes.items():
+        par_type = {}
+        for type_evaluation, _ in liste:
+            par_type[type_evaluation] = par_type.get(type_evaluation, 0) + 1
+        valeurs = [note for _, note in liste]
+        moyenne = (sum(valeurs) / len(valeurs)).quantize(centime)
+        dernieres = valeurs[:3]
+        ProfilStagiaire.objects.filter(pk=stagiaire_id).update(
+            derniere_note=valeurs[0],
+            note_moyenne=moyenne,
+            tendance_note=(sum(dernieres) / len(dernieres) - moyenne).quantize(centime),
+            nombre_evaluations=len(valeurs),
+            evaluations_par_type=par_type,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objectifs', '0006_salairemensuel_cloture'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluation',
+            name='note_moyenne',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('competence_technique'), '+', models.F('qualite_travail')), '+', models.F('autonomie')), '+', models.F('communication')), '+', models.F('respect_delais')), '/', models.Value(5.0)), output_field=models.DecimalField(decimal_places=2, max_digits=3)),
+        ),
+        migrations.AddField(
+            model_name='profilstagiaire',
+            name='derniere_note',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=3, null=True),
+        ),
+        migrations.AddField(
+            model_name='profilstagiaire',
+            name='evaluations_par_type',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profilstagiaire',
+            name='nombre_evaluations',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profilstagiaire',
+            name='note_moyenne',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Moyenne de toutes les évaluations', max_digits=3, null=True),
+        ),
+        migrations.AddField(
+            model_name='profilstagiaire',
+            name='tendance_note',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Moyenne des dernières évaluations moins la moyenne générale', max_digits=3, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['stagiaire', '-date_evaluation', '-date_creation'], name='objectifs_e_stagiai_cdcc46_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['note_moyenne'], name='objectifs_e_note_mo_894280_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profilstagiaire',
+            index=models.Index(fields=['tuteur', 'note_moyenne'], name='objectifs_p_tuteur__db909c_idx'),
+        ),
+        migrations.RunPython(remplir_bilans, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:55
+
+from django.db import migrations
+
+
+# SQL figé à la date de la migration : objectifs.recherche (et son hook
+# post_migrate) garde sa propre copie, libre d'évoluer.
+INSTALLATION = [
+    # Tâches
+    "CREATE VIRTUAL TABLE IF NOT EXISTS objectifs_tache_fts USING fts5("
+    "titre, description, remarques, "
+    "content='objectifs_tache', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS objectifs_tache_fts_ai AFTER INSERT ON objectifs_tache BEGIN "
+    "INSERT INTO objectifs_tache_fts(rowid, titre, description, remarques) "
+    "VALUES (new.id, new.titre, new.description, new.remarques); END",
+    "CREATE TRIGGER IF NOT EXISTS objectifs_tache_fts_ad AFTER DELETE ON objectifs_tache BEGIN "
+    "INSERT INTO objectifs_tache_fts(objectifs_tache_fts, rowid, titre, description, remarques) "
+    "VALUES ('delete', old.id, old.titre, old.description, old.remarques); END",
+    "CREATE TRIGGER IF NOT EXISTS objectifs_tache_fts_au "
+    "AFTER UPDATE OF titre, description, remarques ON objectifs_tache BEGIN "
+    "INSERT INTO objectifs_tache_fts(objectifs_tache_fts, rowid, titre, description, remarques) "
+    "VALUES ('delete', old.id, old.titre, old.description, old.remarques); "
+    "INSERT INTO objectifs_tache_fts(rowid, titre, description, remarques) "
+    "VALUES (new.id, new.titre, new.description, new.remarques); END",
+    "INSERT INTO objectifs_tache_fts(objectifs_tache_fts) VALUES ('rebuild')",
+
+    # Évaluations
+    "CREATE VIRTUAL TABLE IF NOT EXISTS objectifs_evaluation_fts USING fts5("
+    "points_forts, points_amelioration, commentaire_general, objectifs_futurs, "
+    "content='objectifs_evaluation', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS objectifs_evaluation_fts_ai AFTER INSERT ON objectifs_evaluation BEGIN "
+    "INSERT INTO objectifs_evaluation_fts(rowid, points_forts, points_amelioration, commentaire_general, "
+    "objectifs_futurs) VALUES (new.id, new.points_forts, new.points_amelioration, new.commentaire_general, "
+    "new.objectifs_futurs); END",
+    "CREATE TRIGGER IF NOT EXISTS objectifs_evaluation_fts_ad AFTER DELETE ON objectifs_evaluation BEGIN "
+    "INSERT INTO objectifs_evaluation_fts(objectifs_evaluation_fts, rowid, points_forts, points_amelioration, "
+    "commentaire_general, objectifs_futurs) VALUES ('delete', old.id, old.points_forts, "
+    "old.points_amelioration, old.commentaire_general, old.objectifs_futurs); END",
+    "CREATE TRIGGER IF NOT EXISTS objectifs_evaluation_fts_au AFTER UPDATE OF points_forts, "
+    "points_amelioration, commentaire_general, objectifs_futurs ON objectifs_evaluation BEGIN "
+    "INSERT INTO objectifs_evaluation_fts(objectifs_evaluation_fts, rowid, points_forts, points_amelioration, "
+    "commentaire_general, objectifs_futurs) VALUES ('delete', old.id, old.points_forts, "
+    "old.points_amelioration, old.commentaire_general, old.objectifs_futurs); "
+    "INSERT INTO objectifs_evaluation_fts(rowid, points_forts, points_amelioration, commentaire_general, "
+    "objectifs_futurs) VALUES (new.id, new.points_forts, new.points_amelioration, new.commentaire_general, "
+    "new.objectifs_futurs); END",
+    "INSERT INTO objectifs_evaluation_fts(objectifs_evaluation_fts) VALUES ('rebuild')",
+
+    # Profils stagiaires
+    "CREATE VIRTUAL TABLE IF NOT EXISTS objectifs_profilstagiaire_fts USING fts5("
+    "competences, etablissement, domaine_specialisation, "
+    "content='objectifs_profilstagiaire', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS objectifs_profilstagiaire_fts_ai AFTER INSERT ON objectifs_profilstagiaire BEGIN "
+    "INSERT INTO objectifs_profilstagiaire_fts(rowid, competences, etablissement, domaine_specialisation) "
+    "VALUES (new.id, new.competences, new.etablissement, new.domaine_specialisation); END",
+    "CREATE TRIGGER IF NOT EXISTS objectifs_profilstagiaire_fts_ad AFTER DELETE ON objectifs_profilstagiaire BEGIN "
+    "INSERT INTO objectifs_profilstagiaire_fts(objectifs_profilstagiaire_fts, rowid, competences, etablissement, "
+    "domaine_specialisation) VALUES ('delete', old.id, old.competences, old.etablissement, "
+    "old.domaine_specialisation); END",
+    "CREATE TRIGGER IF NOT EXISTS objectifs_profilstagiaire_fts_au "
+    "AFTER UPDATE OF competences, etablissement, domaine_specialisation ON objectifs_profilstagiaire BEGIN "
+    "INSERT INTO objectifs_profilstagiaire_fts(objectifs_profilstagiaire_fts, rowid, competences, etablissement, "
+    "domaine_specialisation) VALUES ('delete', old.id, old.competences, old.etablissement, "
+    "old.domaine_specialisation); "
+    "INSERT INTO objectifs_profilstagiaire_fts(rowid, competences, etablissement, domaine_specialisation) "
+    "VALUES (new.id, new.competences, new.etablissement, new.domaine_specialisation); END",
+    "INSERT INTO objectifs_profilstagiaire_fts(objectifs_profilstagiaire_fts) VALUES ('rebuild')",
+]
+
+SUPPRESSION = [
+    f"DROP {objet} IF EXISTS objectifs_{table}_fts{suffixe}"
+    for table in ('tache', 'evaluation', 'profilstagiaire')
+    for objet, suffixe in (('TRIGGER', '_ai'), ('TRIGGER', '_ad'), ('TRIGGER', '_au'), ('TABLE', ''))
+]
+
+
+class RunSQLSQLite(migrations.RunSQL):
+    """RunSQL exécuté sous SQLite uniquement (FTS5), sans effet ailleurs"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objectifs', '0007_evaluation_note_moyenne'),
+    ]
+
+    operations = [
+        # Index FTS5 + triggers
+        RunSQLSQLite(INSTALLATION, SUPPRESSION),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-17 22:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objectifs', '0008_recherche_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profilstagiaire',
+            name='statut',
+            field=models.CharField(choices=[('a_venir', 'À venir'), ('actif', 'Actif'), ('inactif', 'Inactif'), ('termine', 'Terminé'), ('suspendu', 'Suspendu')], default='actif', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='profilstagiaire',
+            index=models.Index(fields=['statut', 'date_fin_stage'], name='objectifs_p_statut_23b4da_idx'),
+        ),
+    ]
@@ -1,14 +1,53 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Sum, Count, Q, F, Value, Case, When
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
-from decimal import Decimal, InvalidOperation
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from .calendrier import date_iso
+
+
+def _aujourdhui(today):
+    return today if today is not None else timezone.now().date()
+
+
+class ProfilStagiaireQuerySet(models.QuerySet):
+    """Prédicats du cycle de stage évalués en SQL (index statut, date_fin_stage)"""
+
+    def actifs(self, today=None):
+        """Même règle que ProfilStagiaire.est_actif"""
+        today = _aujourdhui(today)
+        return self.filter(statut='actif', date_fin_stage__gte=today, date_debut_stage__lte=today)
+
+    def bientot_termines(self, jours, today=None):
+        """Stagiaires actifs dont le stage finit dans ``jours`` jours au plus, du plus proche au plus lointain"""
+        today = _aujourdhui(today)
+        return self.actifs(today).filter(
+            date_fin_stage__lte=today + timezone.timedelta(days=jours)
+        ).order_by('date_fin_stage', 'pk')
+
+    def expires(self, today=None):
+        """Stages actifs ou à venir dont la date de fin est passée"""
+        return self.filter(statut__in=['actif', 'a_venir'], date_fin_stage__lt=_aujourdhui(today))
+
+    def a_demarrer(self, today=None):
+        """Stages à venir dont la date de début est atteinte"""
+        today = _aujourdhui(today)
+        return self.filter(statut='a_venir', date_fin_stage__gte=today, date_debut_stage__lte=today)
+
+    def pas_commences(self, today=None):
+        """Stages marqués actifs avant leur date de début"""
+        today = _aujourdhui(today)
+        return self.filter(statut='actif', date_fin_stage__gte=today, date_debut_stage__gt=today)
 
 
 class ProfilStagiaire(models.Model):
     """Profil étendu pour les stagiaires"""
     
     STATUT_CHOICES = [
+        ('a_venir', 'À venir'),
         ('actif', 'Actif'),
         ('inactif', 'Inactif'),
         ('termine', 'Terminé'),
@@ -59,14 +98,33 @@ class ProfilStagiaire(models.Model):
     objectifs_stage = models.TextField(blank=True, help_text="Objectifs à atteindre pendant le stage")
     notes_internes = models.TextField(blank=True, help_text="Notes internes sur le stagiaire")
     
+    # Bilan des évaluations (maintenu à chaque évaluation enregistrée ou supprimée)
+    derniere_note = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True,
+                                        editable=False)
+    note_moyenne = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True,
+                                       editable=False, help_text="Moyenne de toutes les évaluations")
+    tendance_note = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True,
+                                        editable=False,
+                                        help_text="Moyenne des dernières évaluations moins la moyenne générale")
+    nombre_evaluations = models.PositiveIntegerField(default=0, editable=False)
+    evaluations_par_type = models.JSONField(default=dict, blank=True, editable=False)
+    
     # Métadonnées
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
     
+    objects = ProfilStagiaireQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Profil Stagiaire"
         verbose_name_plural = "Profils Stagiaires"
         ordering = ['-date_debut_stage']
+        indexes = [
+            # Cohorte d'un tuteur triée par note
+            models.Index(fields=['tuteur', 'note_moyenne']),
+            # Stagiaires actifs, fins de stage proches, job de cycle de vie
+            models.Index(fields=['statut', 'date_fin_stage']),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.etablissement}"
@@ -102,23 +160,38 @@ class ProfilStagiaire(models.Model):
                 self.date_debut_stage <= today <= self.date_fin_stage)
 
 
+def code_choix(choices, valeur):
+    """Retourne le code entier d'un choix saisi par son code ou son libellé"""
+    valeur = str(valeur).strip().lower()
+    for code, libelle in choices:
+        if valeur in (str(code), libelle.lower()):
+            return code
+    return None
+
+
+EtatRollup = namedtuple('EtatRollup', 'stagiaire_id annee semaine_numero date_jour heures terminee')
+
+
 class Tache(models.Model):
     """Tâches assignées aux stagiaires"""
 
+    # Jours stockés selon la numérotation ISO (1 = lundi)
     JOUR_SEMAINE_CHOICES = [
-        ('lundi', 'Lundi'),
-        ('mardi', 'Mardi'),
-        ('mercredi', 'Mercredi'),
-        ('jeudi', 'Jeudi'),
-        ('vendredi', 'Vendredi'),
-        ('samedi', 'Samedi'),
+        (1, 'Lundi'),
+        (2, 'Mardi'),
+        (3, 'Mercredi'),
+        (4, 'Jeudi'),
+        (5, 'Vendredi'),
+        (6, 'Samedi'),
     ]
 
+    # Priorités croissantes : '-priorite' place les urgentes en premier
+    PRIORITE_BASSE, PRIORITE_MOYENNE, PRIORITE_HAUTE, PRIORITE_URGENTE = 1, 2, 3, 4
     PRIORITE_CHOICES = [
-        ('basse', 'Basse'),
-        ('moyenne', 'Moyenne'),
-        ('haute', 'Haute'),
-        ('urgente', 'Urgente'),
+        (PRIORITE_BASSE, 'Basse'),
+        (PRIORITE_MOYENNE, 'Moyenne'),
+        (PRIORITE_HAUTE, 'Haute'),
+        (PRIORITE_URGENTE, 'Urgente'),
     ]
 
     # Relations
@@ -131,14 +204,12 @@ class Tache(models.Model):
     # Infos tâche
     titre = models.CharField(max_length=200)
     description = models.TextField(blank=True)
-    jour_semaine = models.CharField(
-        max_length=20,
+    jour_semaine = models.PositiveSmallIntegerField(
         choices=JOUR_SEMAINE_CHOICES
     )
-    priorite = models.CharField(
-        max_length=20,
+    priorite = models.PositiveSmallIntegerField(
         choices=PRIORITE_CHOICES,
-        default='moyenne'
+        default=PRIORITE_MOYENNE
     )
 
     # Heures (DECIMAL CLEAN)
@@ -152,14 +223,21 @@ class Tache(models.Model):
         max_digits=5,
         decimal_places=2,
         default=Decimal("0.00"),
-        validators=[MinValueValidator(Decimal("0.00"))]
+        validators=[MinValueValidator(Decimal("0.00"))],
+        help_text="Somme des saisies d'heures de la tâche (projection du journal)"
     )
 
     # Dates
     semaine_numero = models.PositiveIntegerField(
-        help_text="Numéro de la semaine dans l'année"
+        help_text="Numéro de la semaine ISO"
+    )
+    annee = models.PositiveIntegerField(
+        help_text="Année ISO de la semaine"
+    )
+    date_jour = models.DateField(
+        editable=False,
+        help_text="Date du jour de la tâche, déduite de (annee, semaine_numero, jour_semaine)"
     )
-    annee = models.PositiveIntegerField()
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
     date_completion = models.DateTimeField(null=True, blank=True)
@@ -173,12 +251,70 @@ class Tache(models.Model):
         verbose_name_plural = "Tâches"
         ordering = ['annee', 'semaine_numero', 'jour_semaine', '-priorite']
         indexes = [
-            models.Index(fields=['stagiaire', 'semaine_numero', 'annee']),
+            # Tâches d'une semaine renvoyées déjà triées (jour, priorité décroissante)
+            models.Index(fields=['stagiaire', 'annee', 'semaine_numero', 'jour_semaine', '-priorite']),
+            # Mois, trimestres et paie = intervalles de dates
+            models.Index(fields=['stagiaire', 'date_jour']),
             models.Index(fields=['est_terminee']),
         ]
 
     def __str__(self):
-        return f"{self.titre} - {self.stagiaire.nom_complet} ({self.jour_semaine})"
+        return f"{self.titre} - {self.stagiaire.nom_complet} ({self.get_jour_semaine_display()})"
+
+    @classmethod
+    def jour_depuis(cls, valeur):
+        """Code du jour à partir de '1', 'lundi' ou 'Lundi' (None si inconnu)"""
+        return code_choix(cls.JOUR_SEMAINE_CHOICES, valeur)
+
+    @classmethod
+    def priorite_depuis(cls, valeur):
+        """Code de priorité à partir de '2', 'moyenne' ou 'Moyenne' (None si inconnu)"""
+        return code_choix(cls.PRIORITE_CHOICES, valeur)
+
+    # ==========================
+    # 📊 SUIVI DES TOTAUX
+    # ==========================
+
+    CHAMPS_ROLLUP = ('stagiaire_id', 'semaine_numero', 'annee', 'date_jour',
+                     'heures_effectuees', 'est_terminee')
+    CHAMPS_DATE_JOUR = ('annee', 'semaine_numero', 'jour_semaine')
+    # Plus grande valeur de heures_effectuees (max_digits=5, decimal_places=2)
+    HEURES_MAX = Decimal("999.99")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._etat_rollup = instance.etat_rollup()
+        return instance
+
+    def etat_rollup(self):
+        """
+        Contribution de la tâche aux totaux de sa semaine et de son mois,
+        ou None si un des champs n'est pas chargé.
+        """
+        if self.get_deferred_fields() & set(self.CHAMPS_ROLLUP):
+            return None
+        heures = self._meta.get_field('heures_effectuees').to_python(self.heures_effectuees)
+        return EtatRollup(self.stagiaire_id, self.annee, self.semaine_numero, self.date_jour,
+                          heures or Decimal("0"), bool(self.est_terminee))
+
+    def calculer_date_jour(self):
+        """Date réelle de la tâche à partir de la semaine ISO et du jour"""
+        return date_iso(self.annee, self.semaine_numero, self.jour_semaine)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(update_fields) & set(self.CHAMPS_DATE_JOUR):
+            self.date_jour = self.calculer_date_jour()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'date_jour'}
+        # Les totaux (signal post_save) sont appliqués dans la même transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
 
     # ==========================
     # 🔢 PROPRIÉTÉS MÉTIER
@@ -204,34 +340,97 @@ class Tache(models.Model):
 
     def ajouter_heures(self, heures):
         """
-        Ajoute des heures effectuées de manière sécurisée
+        Ajoute des heures effectuées en une seule instruction UPDATE (F()) :
+        pas de fenêtre lecture-modification-écriture, deux ajouts simultanés
+        s'additionnent. La tâche est terminée dans la même instruction si
+        les heures estimées sont atteintes ; l'instance reçoit ensuite les
+        valeurs enregistrées.
         """
+        from .rollups import enregistrer_ecriture
+
         try:
             heures = Decimal(heures)
-        except (InvalidOperation, TypeError):
+        except (InvalidOperation, TypeError, ValueError):
             raise ValueError("Heures invalides")
 
+        if not heures.is_finite():
+            raise ValueError("Heures invalides")
+        if heures > self.HEURES_MAX:
+            raise ValueError("Nombre d'heures trop élevé")
+        heures = heures.quantize(Decimal("0.01"), ROUND_HALF_UP)
         if heures <= Decimal("0"):
             raise ValueError("Les heures doivent être supérieures à 0")
 
-        # Sécurité
-        if self.heures_effectuees is None:
-            self.heures_effectuees = Decimal("0")
+        maintenant = timezone.now()
+        nouvelles_heures = F('heures_effectuees') + Value(heures, output_field=models.DecimalField())
+        # Terminaison auto, évaluée sur les valeurs avant mise à jour
+        atteinte = Q(est_terminee=False, heures_estimees__lte=nouvelles_heures)
+
+        with transaction.atomic(using=self._state.db):
+            # Le journal reçoit l'ajout (INSERT seul), la tâche sa projection
+            SaisieHeures.objects.create(
+                stagiaire_id=self.stagiaire_id,
+                tache_id=self.pk,
+                heures=heures,
+                date_saisie=maintenant,
+            )
+            # Borne dans l'UPDATE : le total ne dépasse jamais la capacité du champ
+            modifiee = Tache.objects.filter(
+                pk=self.pk, heures_effectuees__lte=self.HEURES_MAX - heures
+            ).update(
+                date_completion=Case(When(atteinte, then=Value(maintenant)), default=F('date_completion')),
+                est_terminee=Case(When(atteinte, then=Value(True)), default=F('est_terminee')),
+                heures_effectuees=nouvelles_heures,
+                date_modification=maintenant,
+            )
+            if not modifiee:
+                # Annule aussi la saisie du journal
+                raise ValueError("Nombre d'heures trop élevé")
+            # La ligne reste verrouillée par l'UPDATE jusqu'à la fin de la transaction
+            ligne = Tache.objects.get(pk=self.pk)
+
+            nouveau = ligne.etat_rollup()
+            terminee_ici = ligne.est_terminee and ligne.date_completion == maintenant
+            enregistrer_ecriture(
+                nouveau._replace(heures=nouveau.heures - heures,
+                                 terminee=nouveau.terminee and not terminee_ici),
+                nouveau
+            )
+
+        for champ in ('heures_effectuees', 'est_terminee', 'date_completion', 'date_modification'):
+            setattr(self, champ, getattr(ligne, champ))
+        self._etat_rollup = nouveau
+
+
+class SaisieHeures(models.Model):
+    """Journal des heures saisies : une ligne par ajout, jamais modifiée"""
+
+    stagiaire = models.ForeignKey(ProfilStagiaire, on_delete=models.CASCADE, related_name='saisies_heures')
+    tache = models.ForeignKey(Tache, on_delete=models.CASCADE, related_name='saisies')
+    heures = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        help_text="Heures ajoutées (négatives pour une correction)"
+    )
+    date_saisie = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Saisie d'heures"
+        verbose_name_plural = "Saisies d'heures"
+        ordering = ['-date_saisie']
+        indexes = [
+            # Totaux par jour / semaine / mois = intervalles de date_saisie
+            models.Index(fields=['stagiaire', 'date_saisie']),
+        ]
 
-        self.heures_effectuees += heures
+    def __str__(self):
+        return f"{self.heures}h - {self.tache.titre} ({self.date_saisie:%d/%m/%Y %H:%M})"
 
-        # Terminaison auto
-        if self.heures_effectuees >= self.heures_estimees:
-            self.est_terminee = True
-            if not self.date_completion:
-                self.date_completion = timezone.now()
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Une saisie d'heures ne se modifie pas : ajouter une correction")
+        super().save(*args, **kwargs)
 
-        self.save(update_fields=[
-            "heures_effectuees",
-            "est_terminee",
-            "date_completion",
-            "date_modification"
-        ])
 
 class Semaine(models.Model):
     """Suivi des semaines de travail"""
@@ -284,18 +483,39 @@ class Semaine(models.Model):
         return 0
     
     def calculer_totaux(self):
-        """Calcule les totaux de la semaine à partir des tâches"""
-        taches = Tache.objects.filter(
-            stagiaire=self.stagiaire,
+        """
+        Recalcule entièrement les totaux de la semaine à partir des tâches.
+
+        Les totaux sont normalement maintenus par deltas à chaque écriture
+        de tâche ; ce recalcul sert de réconciliation et retourne les écarts
+        corrigés sous la forme {champ: (valeur stockée, valeur recalculée)}.
+        """
+        totaux = Tache.objects.filter(
+            stagiaire_id=self.stagiaire_id,
             semaine_numero=self.numero_semaine,
             annee=self.annee
+        ).aggregate(
+            heures=Sum('heures_effectuees'),
+            nombre=Count('id'),
+            completees=Count('id', filter=Q(est_terminee=True)),
         )
+        heures = totaux['heures'] or Decimal("0")
+        attendus = {
+            'heures_totales': heures,
+            'nombre_taches': totaux['nombre'],
+            'taches_completees': totaux['completees'],
+            'salaire_calcule': (heures * self.stagiaire.taux_horaire).quantize(Decimal("0.01"), ROUND_HALF_UP),
+        }
         
-        self.nombre_taches = taches.count()
-        self.taches_completees = taches.filter(est_terminee=True).count()
-        self.heures_totales = sum(float(t.heures_effectuees) for t in taches)
-        self.salaire_calcule = self.heures_totales * float(self.stagiaire.taux_horaire)
-        self.save()
+        ecarts = {}
+        for champ, valeur in attendus.items():
+            if getattr(self, champ) != valeur:
+                ecarts[champ] = (getattr(self, champ), valeur)
+                setattr(self, champ, valeur)
+        
+        if ecarts:
+            self.save(update_fields=[*ecarts, 'date_modification'])
+        return ecarts
 
 
 class SalaireMensuel(models.Model):
@@ -319,6 +539,11 @@ class SalaireMensuel(models.Model):
     # Statut
     est_paye = models.BooleanField(default=False)
     date_paiement = models.DateField(null=True, blank=True)
+    est_cloture = models.BooleanField(
+        default=False,
+        help_text="Mois clôturé : heures et salaires ne sont plus recalculés"
+    )
+    date_cloture = models.DateTimeField(null=True, blank=True)
     
     # Notes
     notes = models.TextField(blank=True)
@@ -337,7 +562,9 @@ class SalaireMensuel(models.Model):
         return f"{self.stagiaire.nom_complet} - {self.mois}/{self.annee} - {self.salaire_net}€"
     
     def calculer_salaire_net(self):
-        """Calcule le salaire net avec bonus et déductions"""
+        """Calcule le salaire net avec bonus et déductions (sauf mois clôturé)"""
+        if self.est_cloture:
+            return
         self.salaire_net = self.salaire_brut + self.bonus - self.deductions
         self.save()
 
@@ -382,6 +609,16 @@ class Evaluation(models.Model):
     commentaire_general = models.TextField(blank=True)
     objectifs_futurs = models.TextField(blank=True)
     
+    # Note moyenne calculée et stockée par la base (triable, indexée)
+    note_moyenne = models.GeneratedField(
+        expression=(
+            F('competence_technique') + F('qualite_travail') + F('autonomie')
+            + F('communication') + F('respect_delais')
+        ) / 5.0,  # division réelle, y compris sous SQLite
+        output_field=models.DecimalField(max_digits=3, decimal_places=2),
+        db_persist=True,
+    )
+    
     # Métadonnées
     date_creation = models.DateTimeField(auto_now_add=True)
     
@@ -389,11 +626,11 @@ class Evaluation(models.Model):
         verbose_name = "Évaluation"
         verbose_name_plural = "Évaluations"
         ordering = ['-date_evaluation']
+        indexes = [
+            # Dernières évaluations d'un stagiaire (bilan, tendance)
+            models.Index(fields=['stagiaire', '-date_evaluation', '-date_creation']),
+            models.Index(fields=['note_moyenne']),
+        ]
     
     def __str__(self):
-        return f"Évaluation {self.type_evaluation} - {self.stagiaire.nom_complet} - {self.date_evaluation}"
-    
-    @property
-    def note_moyenne(self):
-        return (self.competence_technique + self.qualite_travail + 
-                self.autonomie + self.communication + self.respect_delais) / 5
\ No newline at end of file
+        return f"Évaluation {self.type_evaluation} - {self.stagiaire.nom_complet} - {self.date_evaluation}"
\ No newline at end of file
@@ -0,0 +1,165 @@
+import re
+
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import ProfilStagiaire
+
+
+# Index FTS5 « à contenu externe » : le texte reste dans la table d'origine,
+# l'index est tenu à jour par des triggers SQL (donc aussi pour update(),
+# bulk_create() et bulk_update(), qui ne déclenchent pas de signaux).
+INDEX_RECHERCHE = {
+    'tache': ('objectifs_tache', ['titre', 'description', 'remarques']),
+    'evaluation': ('objectifs_evaluation', [
+        'points_forts', 'points_amelioration', 'commentaire_general', 'objectifs_futurs',
+    ]),
+    'stagiaire': ('objectifs_profilstagiaire', ['competences', 'etablissement', 'domaine_specialisation']),
+}
+
+LIMITE_RESULTATS = 20
+
+
+def recherche_disponible():
+    return connection.vendor == 'sqlite'
+
+
+def _sql_installation(table, colonnes):
+    fts = f'{table}_fts'
+    liste = ', '.join(colonnes)
+    nouvelles = ', '.join(f'new.{colonne}' for colonne in colonnes)
+    anciennes = ', '.join(f'old.{colonne}' for colonne in colonnes)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({liste}, "
+        f"content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {liste}) VALUES (new.id, {nouvelles}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {liste}) VALUES ('delete', old.id, {anciennes}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {liste} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {liste}) VALUES ('delete', old.id, {anciennes}); "
+        f"INSERT INTO {fts}(rowid, {liste}) VALUES (new.id, {nouvelles}); END",
+    ]
+
+
+def installer_recherche(reconstruire=False, using=None):
+    """
+    Crée les index FTS5 et leurs triggers s'ils manquent (idempotent).
+
+    Une migration qui reconstruit une table sous SQLite supprime ses
+    triggers : cette fonction est donc rappelée après chaque migrate.
+    """
+    connexion = connections[using or 'default']
+    if connexion.vendor != 'sqlite':
+        return
+    with connexion.cursor() as cursor:
+        for table, colonnes in INDEX_RECHERCHE.values():
+            for sql in _sql_installation(table, colonnes):
+                cursor.execute(sql)
+            if reconstruire:
+                cursor.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+
+
+def supprimer_recherche(using=None):
+    connexion = connections[using or 'default']
+    if connexion.vendor != 'sqlite':
+        return
+    with connexion.cursor() as cursor:
+        for table, _ in INDEX_RECHERCHE.values():
+            for suffixe in ('ai', 'ad', 'au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffixe}")
+            cursor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+
+
+def requete_fts(texte):
+    """
+    Transforme une saisie libre en requête FTS5 sûre : chaque mot devient
+    un préfixe entre guillemets, tous les mots sont requis.
+    """
+    mots = re.findall(r'\w+', texte or '')
+    return ' '.join(f'"{mot}"*' for mot in mots)
+
+
+def condition_recherche(cle, texte):
+    """Q(pk__in=<sous-requête FTS>) pour la saisie, ou None si FTS5 est indisponible"""
+    requete = requete_fts(texte)
+    if not requete or not recherche_disponible():
+        return None
+    fts = f'{INDEX_RECHERCHE[cle][0]}_fts'
+    return Q(pk__in=RawSQL(f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", [requete]))
+
+
+def stagiaires_par_nom(texte):
+    """Profils dont l'identifiant, le prénom ou le nom contient la saisie"""
+    texte = (texte or '').strip()
+    return ProfilStagiaire.objects.filter(
+        Q(user__username__icontains=texte)
+        | Q(user__first_name__icontains=texte)
+        | Q(user__last_name__icontains=texte)
+    ).values('pk')
+
+
+# Une requête classée par type d'objet : (titre, jointure vers le profil)
+_SQL_RECHERCHE = {
+    'tache': (
+        "o.titre",
+        "o.stagiaire_id",
+    ),
+    'evaluation': (
+        "'Évaluation ' || o.type_evaluation || ' du ' || o.date_evaluation",
+        "o.stagiaire_id",
+    ),
+    'stagiaire': (
+        "COALESCE(NULLIF(TRIM(u.first_name || ' ' || u.last_name), ''), u.username)",
+        "o.id",
+    ),
+}
+
+
+def rechercher(texte, tuteur=None, types=None, limite=LIMITE_RESULTATS):
+    """
+    Recherche classée (bm25) dans les tâches, évaluations et profils.
+
+    ``tuteur`` limite aux stagiaires qu'il supervise. Retourne une liste de
+    dicts triés du plus au moins pertinent.
+    """
+    requete = requete_fts(texte)
+    if not requete or not recherche_disponible():
+        return []
+
+    resultats = []
+    with connection.cursor() as cursor:
+        for cle in types or INDEX_RECHERCHE:
+            table, _ = INDEX_RECHERCHE[cle]
+            fts = f'{table}_fts'
+            titre, stagiaire = _SQL_RECHERCHE[cle]
+            sql = (
+                f"SELECT o.id, {titre}, snippet({fts}, -1, '[', ']', '…', 12), bm25({fts}), "
+                f"p.id, u.username, u.first_name, u.last_name "
+                f"FROM {fts} JOIN {table} o ON o.id = {fts}.rowid "
+                f"JOIN objectifs_profilstagiaire p ON p.id = {stagiaire} "
+                f"JOIN auth_user u ON u.id = p.user_id "
+                f"WHERE {fts} MATCH %s"
+            )
+            parametres = [requete]
+            if tuteur is not None:
+                sql += " AND p.tuteur_id = %s"
+                parametres.append(tuteur.pk)
+            sql += f" ORDER BY bm25({fts}) LIMIT %s"
+            parametres.append(limite)
+            cursor.execute(sql, parametres)
+            for pk, libelle, extrait, score, stagiaire_id, username, prenom, nom in cursor.fetchall():
+                resultats.append({
+                    'type': cle,
+                    'id': pk,
+                    'titre': libelle,
+                    'extrait': extrait,
+                    'score': score,
+                    'stagiaire_id': stagiaire_id,
+                    'stagiaire': f"{prenom} {nom}".strip() or username,
+                })
+
+    # bm25 : plus petit = plus pertinent
+    resultats.sort(key=lambda resultat: resultat['score'])
+    return resultats[:limite]
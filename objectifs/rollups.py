@@ -0,0 +1,611 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal, ROUND_HALF_UP
+import threading
+
+from django.db import connections, transaction
+from django.db.models import Sum, Count, Avg, Q, F, Value, DecimalField, OuterRef, Subquery, DateTimeField
+from django.db.models.functions import Coalesce, Round, ExtractYear, ExtractMonth
+from django.utils import timezone
+
+from .models import ProfilStagiaire, Tache, Semaine, SalaireMensuel, Evaluation
+from .calendrier import bornes_semaine, bornes_mois, mois_de_la_semaine
+from .cache_stagiaire import invalider_stagiaires, invalider_stagiaire, invalider_tout
+
+
+def _taux_horaire():
+    """Taux horaire du stagiaire de la ligne mise à jour (sous-requête)"""
+    return Subquery(
+        ProfilStagiaire.objects.filter(pk=OuterRef('stagiaire_id')).values('taux_horaire')[:1]
+    )
+
+
+def _decimal(valeur):
+    return Value(Decimal(valeur), output_field=DecimalField())
+
+
+# ==========================
+# ➕ DELTAS (chemin d'écriture)
+# ==========================
+
+def delta_semaine(stagiaire_id, annee, numero_semaine, heures=Decimal("0"),
+                  taches=0, completees=0, creer=True):
+    """
+    Applique un delta aux totaux d'une semaine en une seule instruction
+    UPDATE (expressions F()). La ligne n'est créée que si elle manque et
+    que ``creer`` est vrai (première tâche de la semaine).
+    """
+    nouvelles_heures = F('heures_totales') + _decimal(heures)
+    semaines = Semaine.objects.filter(
+        stagiaire_id=stagiaire_id,
+        numero_semaine=numero_semaine,
+        annee=annee
+    )
+    delta = {
+        'heures_totales': nouvelles_heures,
+        'nombre_taches': F('nombre_taches') + taches,
+        'taches_completees': F('taches_completees') + completees,
+        'salaire_calcule': Round(nouvelles_heures * _taux_horaire(), 2),
+    }
+    if not semaines.update(**delta) and creer:
+        date_debut, date_fin = bornes_semaine(annee, numero_semaine)
+        Semaine.objects.get_or_create(
+            stagiaire_id=stagiaire_id,
+            numero_semaine=numero_semaine,
+            annee=annee,
+            defaults={'date_debut': date_debut, 'date_fin': date_fin}
+        )
+        semaines.update(**delta)
+
+
+def delta_mois(stagiaire_id, annee, mois, heures=Decimal("0"), creer=True):
+    """Applique un delta d'heures au salaire mensuel (brut et net recalculés en SQL)"""
+    nouvelles_heures = F('heures_totales') + _decimal(heures)
+    salaire_brut = Round(nouvelles_heures * _taux_horaire(), 2)
+    # Les mois clôturés ne bougent plus
+    salaires = SalaireMensuel.objects.filter(stagiaire_id=stagiaire_id, mois=mois, annee=annee, est_cloture=False)
+    delta = {
+        'heures_totales': nouvelles_heures,
+        'salaire_brut': salaire_brut,
+        'salaire_net': salaire_brut + F('bonus') - F('deductions'),
+    }
+    if not salaires.update(**delta) and creer:
+        SalaireMensuel.objects.get_or_create(stagiaire_id=stagiaire_id, mois=mois, annee=annee)
+        salaires.update(**delta)
+
+
+def _cle_semaine(etat):
+    return etat.stagiaire_id, etat.annee, etat.semaine_numero
+
+
+def _cle_mois(etat):
+    return etat.stagiaire_id, etat.date_jour.year, etat.date_jour.month
+
+
+_ecritures_differees = threading.local()
+
+
+def enregistrer_ecriture(ancien, nouveau):
+    """
+    Répercute une écriture de tâche sur les totaux.
+
+    ``ancien`` et ``nouveau`` sont des EtatRollup (None pour une création ou
+    une suppression). Le coût est constant : au plus deux UPDATE par ligne de
+    totaux touchée (semaine de la tâche, mois de sa date), sans relire les
+    tâches. Dans un bloc ``ecritures_groupees()``, l'écriture est différée.
+    """
+    paires = getattr(_ecritures_differees, 'paires', None)
+    if paires is not None:
+        paires.append((ancien, nouveau))
+    else:
+        appliquer_ecritures([(ancien, nouveau)])
+
+
+def appliquer_ecritures(paires):
+    """
+    Cumule les deltas de plusieurs écritures (ancien, nouveau) et applique
+    un seul UPDATE par semaine et par mois touchés.
+    """
+    # clé → [heures, tâches, complétées, créer]
+    semaines = defaultdict(lambda: [Decimal("0"), 0, 0, False])
+    # clé → [heures, tâches, créer]
+    mois = defaultdict(lambda: [Decimal("0"), 0, False])
+
+    for ancien, nouveau in paires:
+        if ancien is not None:
+            semaine = semaines[_cle_semaine(ancien)]
+            semaine[0] -= ancien.heures
+            semaine[1] -= 1
+            semaine[2] -= int(ancien.terminee)
+            cumul = mois[_cle_mois(ancien)]
+            cumul[0] -= ancien.heures
+            cumul[1] -= 1
+        if nouveau is not None:
+            semaine = semaines[_cle_semaine(nouveau)]
+            semaine[0] += nouveau.heures
+            semaine[1] += 1
+            semaine[2] += int(nouveau.terminee)
+            semaine[3] = True
+            cumul = mois[_cle_mois(nouveau)]
+            cumul[0] += nouveau.heures
+            cumul[1] += 1
+            cumul[2] = True
+
+    # Même sans delta (titre modifié...), la tâche affichée a changé
+    invalider_stagiaires(
+        etat.stagiaire_id for paire in paires for etat in paire if etat is not None
+    )
+
+    # La ligne d'une clé n'est créée que si une tâche y arrive
+    for cle, (heures, taches, completees, creer) in semaines.items():
+        if heures or taches or completees:
+            delta_semaine(*cle, heures=heures, taches=taches, completees=completees, creer=creer)
+    for cle, (heures, taches, creer) in mois.items():
+        if heures or taches:
+            delta_mois(*cle, heures=heures, creer=creer)
+
+
+@contextmanager
+def ecritures_groupees():
+    """
+    Diffère les deltas des écritures de tâches du bloc (signaux compris)
+    et les applique en une fois à la sortie. À utiliser dans une
+    transaction ; en cas d'exception, rien n'est appliqué.
+    """
+    if getattr(_ecritures_differees, 'paires', None) is not None:
+        # Bloc imbriqué : le bloc englobant appliquera tout
+        yield
+        return
+    _ecritures_differees.paires = []
+    try:
+        yield
+        paires = _ecritures_differees.paires
+    finally:
+        _ecritures_differees.paires = None
+    appliquer_ecritures(paires)
+
+
+# ==========================
+# 🔁 RÉCONCILIATION (recalcul complet)
+# ==========================
+
+def actualiser_salaire_mensuel(stagiaire_id, mois, annee, creer=True):
+    """Recalcule heures, salaire brut et salaire net du mois à partir des tâches"""
+    heures = Tache.objects.filter(
+        stagiaire_id=stagiaire_id,
+        date_jour__range=bornes_mois(annee, mois)
+    ).aggregate(heures=Sum('heures_effectuees'))['heures'] or Decimal("0")
+
+    salaires = SalaireMensuel.objects.filter(stagiaire_id=stagiaire_id, mois=mois, annee=annee)
+    if creer and not salaires.exists():
+        SalaireMensuel.objects.get_or_create(stagiaire_id=stagiaire_id, mois=mois, annee=annee)
+    salaires = salaires.filter(est_cloture=False)
+
+    salaire_brut = Round(_decimal(heures) * _taux_horaire(), 2)
+    salaires.update(
+        heures_totales=heures,
+        salaire_brut=salaire_brut,
+        salaire_net=salaire_brut + F('bonus') - F('deductions'),
+    )
+
+
+def actualiser_rollups(stagiaire_id, numero_semaine, annee, creer=True):
+    """
+    Recalcule entièrement la semaine et les mois concernés.
+
+    Retourne les écarts trouvés sur la semaine (voir Semaine.calculer_totaux).
+    """
+    ecarts = {}
+    semaine = Semaine.objects.filter(
+        stagiaire_id=stagiaire_id,
+        numero_semaine=numero_semaine,
+        annee=annee
+    ).select_related('stagiaire').first()
+    if semaine is None and creer:
+        date_debut, date_fin = bornes_semaine(annee, numero_semaine)
+        semaine, _ = Semaine.objects.get_or_create(
+            stagiaire_id=stagiaire_id,
+            numero_semaine=numero_semaine,
+            annee=annee,
+            defaults={'date_debut': date_debut, 'date_fin': date_fin}
+        )
+    if semaine is not None:
+        ecarts = semaine.calculer_totaux()
+
+    for annee_mois, mois in mois_de_la_semaine(annee, numero_semaine):
+        actualiser_salaire_mensuel(stagiaire_id, mois, annee_mois, creer=creer)
+    invalider_stagiaire(stagiaire_id)
+    return ecarts
+
+
+# ==========================
+# 🧮 RECALCUL EN MASSE (ensembliste)
+# ==========================
+
+TAILLE_LOT = 500
+
+CHAMPS_SEMAINE = ['heures_totales', 'nombre_taches', 'taches_completees', 'salaire_calcule']
+CHAMPS_SALAIRE = ['heures_totales', 'salaire_brut', 'salaire_net']
+
+
+def _sous_total(taches, agregat, defaut):
+    """Sous-requête corrélée : agrégat des tâches de la ligne mise à jour"""
+    return Coalesce(
+        Subquery(taches.order_by().values('stagiaire_id').annotate(total=agregat).values('total')),
+        defaut,
+    )
+
+
+def recalculer_semaines(semaines):
+    """
+    Recalcule les totaux des semaines du queryset en un seul UPDATE, chaque
+    ligne relisant ses tâches par sous-requête corrélée. Retourne le nombre
+    de semaines mises à jour.
+    """
+    taches = Tache.objects.filter(
+        stagiaire_id=OuterRef('stagiaire_id'),
+        annee=OuterRef('annee'),
+        semaine_numero=OuterRef('numero_semaine'),
+    )
+    heures = _sous_total(taches, Sum('heures_effectuees'), _decimal(0))
+    invalider_stagiaires(semaines.values_list('stagiaire_id', flat=True).distinct())
+    return semaines.update(
+        heures_totales=heures,
+        nombre_taches=_sous_total(taches, Count('id'), 0),
+        taches_completees=_sous_total(taches.filter(est_terminee=True), Count('id'), 0),
+        salaire_calcule=Round(heures * _taux_horaire(), 2),
+        date_modification=timezone.now(),
+    )
+
+
+def recalculer_salaires(salaires):
+    """
+    Recalcule heures, brut et net des salaires du queryset en un seul
+    UPDATE (mois clôturés exclus). Retourne le nombre de salaires mis à jour.
+    """
+    salaires = salaires.filter(est_cloture=False)
+    taches = Tache.objects.filter(
+        stagiaire_id=OuterRef('stagiaire_id'),
+        date_jour__year=OuterRef('annee'),
+        date_jour__month=OuterRef('mois'),
+    )
+    heures = _sous_total(taches, Sum('heures_effectuees'), _decimal(0))
+    salaire_brut = Round(heures * _taux_horaire(), 2)
+    invalider_stagiaires(salaires.values_list('stagiaire_id', flat=True).distinct())
+    return salaires.update(
+        heures_totales=heures,
+        salaire_brut=salaire_brut,
+        salaire_net=salaire_brut + F('bonus') - F('deductions'),
+        date_modification=timezone.now(),
+    )
+
+
+def _montant(valeur):
+    return valeur.quantize(Decimal("0.01"), ROUND_HALF_UP)
+
+
+def _ecrire_par_lots(model, objets, champs, taille_lot, creation=False):
+    """Écrit les lignes par lots, chaque lot dans sa propre transaction"""
+    if not creation:
+        # bulk_update ne déclenche pas auto_now
+        maintenant = timezone.now()
+        for objet in objets:
+            objet.date_modification = maintenant
+    for debut in range(0, len(objets), taille_lot):
+        lot = objets[debut:debut + taille_lot]
+        with transaction.atomic():
+            if creation:
+                model.objects.bulk_create(lot)
+            else:
+                model.objects.bulk_update(lot, champs)
+    if objets:
+        invalider_tout()
+
+
+def _comparer(objet, attendus, libelle, ecarts):
+    """Compare l'objet aux valeurs attendues, les applique et note les écarts"""
+    modifie = False
+    for champ, valeur in attendus.items():
+        ancienne = getattr(objet, champ)
+        if ancienne != valeur:
+            ecarts.append((libelle, champ, ancienne, valeur))
+            setattr(objet, champ, valeur)
+            modifie = True
+    return modifie
+
+
+def recalculer_totaux(filtres=None, cles_semaines=None, cles_salaires=None,
+                      dry_run=False, taille_lot=TAILLE_LOT):
+    """
+    Recalcule les totaux Semaine et SalaireMensuel à partir d'un GROUP BY
+    sur Tache par portée : (stagiaire, année ISO, semaine) pour les
+    semaines, (stagiaire, année, mois de date_jour) pour les salaires.
+
+    ``filtres`` s'applique à Tache, Semaine et SalaireMensuel
+    (ex. ``{'annee': 2026, 'stagiaire__tuteur__username': 'paul'}``) ; pour
+    les salaires, ``annee`` porte sur l'année civile de date_jour.
+    ``cles_semaines`` / ``cles_salaires`` limitent l'écriture à certaines
+    lignes (stagiaire_id, semaine|mois, année). Les salaires des mois
+    clôturés ne sont jamais modifiés. En ``dry_run``, rien n'est écrit et
+    seuls les écarts sont retournés.
+    """
+    filtres = filtres or {}
+
+    # Une seule agrégation sur les tâches
+    groupes = (
+        Tache.objects.filter(**filtres)
+        .order_by()
+        .values('stagiaire_id', 'annee', 'semaine_numero', 'stagiaire__taux_horaire')
+        .annotate(
+            heures=Sum('heures_effectuees'),
+            nombre=Count('id'),
+            completees=Count('id', filter=Q(est_terminee=True)),
+        )
+    )
+
+    semaines_attendues = {}
+    taux = {}
+    for groupe in groupes:
+        stagiaire_id = groupe['stagiaire_id']
+        taux[stagiaire_id] = groupe['stagiaire__taux_horaire']
+        semaines_attendues[(stagiaire_id, groupe['semaine_numero'], groupe['annee'])] = groupe
+
+    filtres_mois = {
+        cle.replace('annee', 'date_jour__year', 1) if cle.startswith('annee') else cle: valeur
+        for cle, valeur in filtres.items()
+    }
+    groupes_mois = (
+        Tache.objects.filter(**filtres_mois)
+        .order_by()
+        .annotate(annee_mois=ExtractYear('date_jour'), mois=ExtractMonth('date_jour'))
+        .values('stagiaire_id', 'annee_mois', 'mois', 'stagiaire__taux_horaire')
+        .annotate(heures=Sum('heures_effectuees'))
+    )
+    heures_par_mois = {}
+    for groupe in groupes_mois:
+        taux[groupe['stagiaire_id']] = groupe['stagiaire__taux_horaire']
+        heures_par_mois[(groupe['stagiaire_id'], groupe['mois'], groupe['annee_mois'])] = groupe['heures']
+
+    resultat = {
+        'semaines': 0, 'semaines_creees': 0,
+        'salaires': 0, 'salaires_crees': 0,
+        'ecarts': [],
+    }
+    ecarts = resultat['ecarts']
+
+    # Semaines
+    a_modifier, a_creer = [], []
+    existantes = Semaine.objects.filter(**filtres).only(
+        'id', 'stagiaire_id', 'numero_semaine', 'annee', *CHAMPS_SEMAINE
+    )
+    for semaine in existantes:
+        cle = (semaine.stagiaire_id, semaine.numero_semaine, semaine.annee)
+        groupe = semaines_attendues.pop(cle, None)
+        if cles_semaines is not None and cle not in cles_semaines:
+            continue
+        resultat['semaines'] += 1
+        if groupe is None:
+            attendus = dict.fromkeys(CHAMPS_SEMAINE, 0)
+        else:
+            attendus = {
+                'heures_totales': groupe['heures'],
+                'nombre_taches': groupe['nombre'],
+                'taches_completees': groupe['completees'],
+                'salaire_calcule': _montant(groupe['heures'] * groupe['stagiaire__taux_horaire']),
+            }
+        libelle = f"Semaine {semaine.numero_semaine}/{semaine.annee} (stagiaire {semaine.stagiaire_id})"
+        if _comparer(semaine, attendus, libelle, ecarts):
+            a_modifier.append(semaine)
+
+    for (stagiaire_id, numero, annee), groupe in semaines_attendues.items():
+        if cles_semaines is not None and (stagiaire_id, numero, annee) not in cles_semaines:
+            continue
+        date_debut, date_fin = bornes_semaine(annee, numero)
+        semaine = Semaine(
+            stagiaire_id=stagiaire_id, numero_semaine=numero, annee=annee,
+            date_debut=date_debut, date_fin=date_fin,
+            heures_totales=groupe['heures'],
+            nombre_taches=groupe['nombre'],
+            taches_completees=groupe['completees'],
+            salaire_calcule=_montant(groupe['heures'] * groupe['stagiaire__taux_horaire']),
+        )
+        ecarts.append((f"Semaine {numero}/{annee} (stagiaire {stagiaire_id})", 'création', None, semaine.heures_totales))
+        a_creer.append(semaine)
+    resultat['semaines'] += len(a_creer)
+    resultat['semaines_creees'] = len(a_creer)
+
+    if not dry_run:
+        _ecrire_par_lots(Semaine, a_modifier, CHAMPS_SEMAINE + ['date_modification'], taille_lot)
+        _ecrire_par_lots(Semaine, a_creer, None, taille_lot, creation=True)
+
+    # Salaires mensuels
+    a_modifier, a_creer = [], []
+    existants = SalaireMensuel.objects.filter(**filtres).only(
+        'id', 'stagiaire_id', 'mois', 'annee', 'bonus', 'deductions', 'est_cloture', *CHAMPS_SALAIRE
+    )
+    taux_manquants = {s.stagiaire_id for s in existants} - set(taux)
+    taux.update(
+        ProfilStagiaire.objects.filter(pk__in=taux_manquants).values_list('id', 'taux_horaire')
+    )
+    for salaire in existants:
+        cle = (salaire.stagiaire_id, salaire.mois, salaire.annee)
+        heures = heures_par_mois.pop(cle, Decimal("0"))
+        if salaire.est_cloture or (cles_salaires is not None and cle not in cles_salaires):
+            continue
+        resultat['salaires'] += 1
+        salaire_brut = _montant(heures * taux[salaire.stagiaire_id])
+        attendus = {
+            'heures_totales': heures,
+            'salaire_brut': salaire_brut,
+            'salaire_net': salaire_brut + salaire.bonus - salaire.deductions,
+        }
+        libelle = f"Salaire {salaire.mois}/{salaire.annee} (stagiaire {salaire.stagiaire_id})"
+        if _comparer(salaire, attendus, libelle, ecarts):
+            a_modifier.append(salaire)
+
+    for (stagiaire_id, mois, annee), heures in heures_par_mois.items():
+        if cles_salaires is not None and (stagiaire_id, mois, annee) not in cles_salaires:
+            continue
+        salaire_brut = _montant(heures * taux[stagiaire_id])
+        a_creer.append(SalaireMensuel(
+            stagiaire_id=stagiaire_id, mois=mois, annee=annee,
+            heures_totales=heures, salaire_brut=salaire_brut, salaire_net=salaire_brut,
+        ))
+        ecarts.append((f"Salaire {mois}/{annee} (stagiaire {stagiaire_id})", 'création', None, heures))
+    resultat['salaires'] += len(a_creer)
+    resultat['salaires_crees'] = len(a_creer)
+
+    if not dry_run:
+        _ecrire_par_lots(SalaireMensuel, a_modifier, CHAMPS_SALAIRE + ['date_modification'], taille_lot)
+        _ecrire_par_lots(SalaireMensuel, a_creer, None, taille_lot, creation=True)
+
+    return resultat
+
+
+# ==========================
+# 🔒 CLÔTURE MENSUELLE
+# ==========================
+
+def _inserer_selection(model, selection, colonnes):
+    """
+    INSERT ... SELECT en une requête : ``colonnes`` associe chaque champ de
+    ``model`` à une expression évaluée sur les lignes de ``selection``.
+
+    L'ORM n'offre pas d'INSERT ... SELECT ; bulk_create prépare chaque valeur
+    en Python et SQLite le limite à ~66 lignes par requête (999 paramètres),
+    soit ~1,5 s pour 10 000 stagiaires, au-delà de l'objectif d'une seconde.
+    Le SELECT reste compilé par l'ORM (paramètres adaptés par la base).
+    """
+    connexion = connections[selection.db]
+    requete = selection.order_by().values(
+        **{f'colonne_{index}': expression for index, expression in enumerate(colonnes.values())}
+    ).query
+    sql, params = requete.get_compiler(selection.db).as_sql()
+    cibles = ', '.join(connexion.ops.quote_name(model._meta.get_field(champ).column) for champ in colonnes)
+    with connexion.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {connexion.ops.quote_name(model._meta.db_table)} ({cibles}) {sql}', params)
+        return cursor.rowcount
+
+
+@transaction.atomic
+def cloturer_mois(annee, mois, dry_run=False):
+    """
+    Calcule et verrouille les salaires d'un mois pour tous les stagiaires
+    actifs (et ceux qui ont des heures ce mois-là).
+
+    Ensembliste, sans ligne préparée en Python : un INSERT ... SELECT crée
+    directement clôturées les lignes SalaireMensuel manquantes, puis un
+    UPDATE à sous-requêtes corrélées calcule et clôture les lignes encore
+    ouvertes ; les totaux sont relus par une agrégation. Les lignes déjà
+    clôturées ne sont pas recalculées. En ``dry_run``, la transaction est
+    annulée.
+    """
+    debut, fin = bornes_mois(annee, mois)
+    taches_mois = Tache.objects.filter(date_jour__range=(debut, fin))
+    concernes = ProfilStagiaire.objects.filter(
+        Q(statut='actif')
+        | Q(pk__in=taches_mois.filter(heures_effectuees__gt=0).values('stagiaire_id'))
+    )
+    salaires_mois = SalaireMensuel.objects.filter(annee=annee, mois=mois, stagiaire__in=concernes)
+    deja_clotures = salaires_mois.filter(est_cloture=True).count()
+    maintenant = timezone.now()
+    horodatage = Value(maintenant, output_field=DateTimeField())
+
+    heures = _sous_total(taches_mois.filter(stagiaire_id=OuterRef('pk')), Sum('heures_effectuees'), _decimal(0))
+    salaire_brut = Round(heures * F('taux_horaire'), 2)
+    crees = _inserer_selection(
+        SalaireMensuel,
+        concernes.exclude(pk__in=SalaireMensuel.objects.filter(annee=annee, mois=mois).values('stagiaire_id')),
+        {
+            'stagiaire': F('pk'),
+            'mois': Value(mois),
+            'annee': Value(annee),
+            'heures_totales': heures,
+            'salaire_brut': salaire_brut,
+            'bonus': _decimal(0),
+            'deductions': _decimal(0),
+            'salaire_net': salaire_brut,
+            'est_paye': Value(False),
+            'est_cloture': Value(True),
+            'date_cloture': horodatage,
+            'notes': Value(''),
+            'date_creation': horodatage,
+            'date_modification': horodatage,
+        },
+    )
+
+    heures = _sous_total(
+        taches_mois.filter(stagiaire_id=OuterRef('stagiaire_id')), Sum('heures_effectuees'), _decimal(0)
+    )
+    salaire_brut = Round(heures * _taux_horaire(), 2)
+    resultat = {
+        'deja_clotures': deja_clotures,
+        'clotures': crees + salaires_mois.filter(est_cloture=False).update(
+            heures_totales=heures,
+            salaire_brut=salaire_brut,
+            salaire_net=salaire_brut + F('bonus') - F('deductions'),
+            est_cloture=True,
+            date_cloture=maintenant,
+            date_modification=maintenant,
+        ),
+    }
+    totaux = salaires_mois.filter(date_cloture=maintenant).aggregate(
+        heures=Coalesce(Sum('heures_totales'), _decimal(0)),
+        salaire_net=Coalesce(Sum('salaire_net'), _decimal(0)),
+    )
+    resultat.update({cle: _montant(valeur) for cle, valeur in totaux.items()})
+
+    if dry_run:
+        transaction.set_rollback(True)
+    else:
+        invalider_tout()
+    return resultat
+
+
+def rouvrir_mois(annee, mois):
+    """Déverrouille un mois clôturé ; ses salaires seront recalculés au prochain passage"""
+    rouverts = SalaireMensuel.objects.filter(annee=annee, mois=mois, est_cloture=True).update(
+        est_cloture=False, date_cloture=None, date_modification=timezone.now()
+    )
+    invalider_tout()
+    return rouverts
+
+
+# ==========================
+# ⭐ BILAN DES ÉVALUATIONS
+# ==========================
+
+EVALUATIONS_TENDANCE = 3
+
+
+def actualiser_bilan_evaluations(stagiaire_id):
+    """
+    Recalcule le bilan des évaluations d'un stagiaire (dernière note,
+    moyenne, tendance sur les EVALUATIONS_TENDANCE dernières, nombre par
+    type) à partir de la note stockée en base : trois petites requêtes
+    indexées, puis un UPDATE du profil.
+    """
+    evaluations = Evaluation.objects.filter(stagiaire_id=stagiaire_id)
+    par_type = dict(
+        evaluations.order_by().values('type_evaluation')
+        .annotate(nombre=Count('id')).values_list('type_evaluation', 'nombre')
+    )
+    moyenne = evaluations.aggregate(moyenne=Avg('note_moyenne'))['moyenne']
+    dernieres = list(
+        evaluations.order_by('-date_evaluation', '-date_creation')
+        .values_list('note_moyenne', flat=True)[:EVALUATIONS_TENDANCE]
+    )
+
+    derniere_note = tendance = None
+    if dernieres:
+        moyenne = _montant(Decimal(moyenne))
+        derniere_note = dernieres[0]
+        tendance = _montant(sum(dernieres, Decimal("0")) / len(dernieres) - moyenne)
+
+    ProfilStagiaire.objects.filter(pk=stagiaire_id).update(
+        derniere_note=derniere_note,
+        note_moyenne=moyenne,
+        tendance_note=tendance,
+        nombre_evaluations=sum(par_type.values()),
+        evaluations_par_type=par_type,
+    )
@@ -0,0 +1,95 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import router
+
+
+# Alias de lecture de la vue en cours (None : base principale)
+_alias_lecture = ContextVar('alias_lecture', default=None)
+
+# Sessions et comptes toujours lus sur la principale : une session créée
+# à la connexion n'existe pas encore sur la copie
+APPS_PRIMAIRE = {'sessions', 'auth', 'contenttypes', 'admin'}
+
+CLE_SESSION = '_derniere_ecriture'
+METHODES_LECTURE = ('GET', 'HEAD', 'OPTIONS')
+
+
+def alias_replica():
+    """Alias de la copie en lecture, ou None si elle n'est pas configurée"""
+    alias = getattr(settings, 'REPLICA_LECTURE', None)
+    return alias if alias in settings.DATABASES else None
+
+
+class RouteurLectureEcriture:
+    """
+    Écritures toujours sur 'default' ; lectures envoyées sur la copie
+    uniquement à l'intérieur d'une vue décorée par @lecture_replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _alias_lecture.get()
+        if alias and model._meta.app_label not in APPS_PRIMAIRE:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Même schéma des deux côtés : les relations restent valides
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La copie reçoit le schéma avec les données (synchroniser_replica)
+        if db == alias_replica():
+            return False
+        return None
+
+
+def ecriture_recente(request):
+    """Vrai si la session a écrit il y a moins de REPLICA_STICKY_SECONDES"""
+    derniere = request.session.get(CLE_SESSION) if hasattr(request, 'session') else None
+    return derniere is not None and time.time() - derniere < settings.REPLICA_STICKY_SECONDES
+
+
+def lecture_replica(vue):
+    """
+    Lit sur la copie pendant la vue, sauf pour une requête d'écriture ou
+    si la session vient d'écrire (lecture de ses propres écritures).
+    """
+    @wraps(vue)
+    def enveloppe(request, *args, **kwargs):
+        alias = alias_replica()
+        if alias is None or request.method not in METHODES_LECTURE or ecriture_recente(request):
+            return vue(request, *args, **kwargs)
+        jeton = _alias_lecture.set(alias)
+        try:
+            return vue(request, *args, **kwargs)
+        finally:
+            _alias_lecture.reset(jeton)
+    return enveloppe
+
+
+def base_de_lecture(model):
+    """
+    Alias à fixer avec .using() pour un queryset évalué après la vue
+    (réponse en flux), le décorateur n'étant alors plus actif.
+    """
+    return router.db_for_read(model)
+
+
+class EcritureStickyMiddleware:
+    """Note l'heure de la dernière requête d'écriture réussie de la session"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (alias_replica() is not None and request.method not in METHODES_LECTURE
+                and response.status_code < 400 and hasattr(request, 'session')):
+            request.session[CLE_SESSION] = time.time()
+        return response
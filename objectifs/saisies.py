@@ -0,0 +1,103 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Sum, F, OuterRef, Subquery, DecimalField
+from django.db.models.functions import Coalesce, TruncDate, TruncWeek, TruncMonth
+from django.utils import timezone
+
+from .models import Tache, SaisieHeures
+from .cache_stagiaire import invalider_stagiaires
+
+
+TRONCATURES = {
+    'jour': TruncDate,
+    'semaine': TruncWeek,
+    'mois': TruncMonth,
+}
+
+
+def saisie_corrective(ancien, nouveau, tache_id):
+    """
+    Saisie qui fait suivre au journal un changement direct des heures d'une
+    tâche (formulaire, admin, lot), ou None si les heures n'ont pas bougé.
+    ``ancien`` / ``nouveau`` sont des EtatRollup (ancien None à la création).
+    """
+    heures = nouveau.heures - (ancien.heures if ancien is not None else Decimal("0"))
+    if not heures:
+        return None
+    return SaisieHeures(stagiaire_id=nouveau.stagiaire_id, tache_id=tache_id, heures=heures)
+
+
+def ecart_journal(tache):
+    """Différence entre les heures de la tâche et la somme de ses saisies"""
+    journal = tache.saisies.aggregate(heures=Sum('heures'))['heures'] or Decimal("0")
+    return tache.heures_effectuees - journal
+
+
+def _debut_du_jour(jour):
+    return timezone.make_aware(datetime.combine(jour, time.min))
+
+
+def totaux_saisies(stagiaire, debut, fin, periode='jour'):
+    """
+    Heures saisies par jour, semaine ou mois entre deux dates (incluses),
+    en un seul GROUP BY sur l'index (stagiaire, date_saisie).
+
+    Retourne {date de début de période: heures}.
+    """
+    tronquer = TRONCATURES[periode]
+    lignes = (
+        SaisieHeures.objects.filter(
+            stagiaire=stagiaire,
+            date_saisie__gte=_debut_du_jour(debut),
+            date_saisie__lt=_debut_du_jour(fin + timedelta(days=1)),
+        )
+        .order_by()
+        .annotate(periode=tronquer('date_saisie'))
+        .values('periode')
+        .annotate(heures=Sum('heures'))
+        .order_by('periode')
+    )
+    return {
+        (ligne['periode'].date() if isinstance(ligne['periode'], datetime) else ligne['periode']): ligne['heures']
+        for ligne in lignes
+    }
+
+
+def projeter_saisies(filtres=None, dry_run=False):
+    """
+    Recalcule Tache.heures_effectuees à partir du journal des saisies.
+
+    Retourne les écarts (tâche, ancienne valeur, valeur du journal). Les
+    totaux Semaine / SalaireMensuel ne sont pas touchés : lancer ensuite
+    recalculer_totaux().
+    """
+    journal = (
+        SaisieHeures.objects.filter(tache=OuterRef('pk'))
+        .order_by()
+        .values('tache')
+        .annotate(total=Sum('heures'))
+        .values('total')
+    )
+    taches = (
+        Tache.objects.filter(**(filtres or {}))
+        .annotate(projection=Coalesce(
+            Subquery(journal), Decimal("0"),
+            output_field=DecimalField(max_digits=5, decimal_places=2)
+        ))
+        .exclude(heures_effectuees=F('projection'))
+        .only('id', 'stagiaire_id', 'titre', 'heures_effectuees')
+    )
+
+    ecarts, a_modifier = [], []
+    maintenant = timezone.now()
+    for tache in taches:
+        ecarts.append((tache, tache.heures_effectuees, tache.projection))
+        tache.heures_effectuees = tache.projection
+        tache.date_modification = maintenant
+        a_modifier.append(tache)
+
+    if not dry_run and a_modifier:
+        Tache.objects.bulk_update(a_modifier, ['heures_effectuees', 'date_modification'], batch_size=500)
+        invalider_stagiaires(tache.stagiaire_id for tache in a_modifier)
+    return ecarts
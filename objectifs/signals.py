@@ -1,17 +1,140 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.db.models.signals import post_save, post_delete, post_migrate, m2m_changed
+from django.db.backends.signals import connection_created
 from django.dispatch import receiver
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import ProfilStagiaire
-from django.utils import timezone
+from .models import ProfilStagiaire, Tache, SaisieHeures, Semaine, SalaireMensuel, Evaluation
+from .rollups import actualiser_rollups, enregistrer_ecriture, actualiser_bilan_evaluations
+from .saisies import saisie_corrective, ecart_journal
+from .recherche import installer_recherche
+from .cache_stagiaire import invalider_stagiaire
+from .inscriptions import role_compte, profil_par_defaut, synchroniser_profil
+from .checks import pragmas_effectifs
+
+logger = logging.getLogger(__name__)
+_bases_journalisees = set()
+
 
 @receiver(post_save, sender=User)
-def creer_profil_stagiaire(sender, instance, created, **kwargs):
+def creer_profil_stagiaire(sender, instance, created, raw=False, update_fields=None, **kwargs):
     """
-    Crée automatiquement un ProfilStagiaire à la création d'un User.
+    Crée le profil d'un nouveau compte stagiaire, et le retire d'un compte
+    passé au personnel. Les tuteurs (groupe Tuteurs) sont traités à l'ajout
+    au groupe ; l'import de cohorte (bulk_create, sans signal) crée ses
+    profils lui-même avec les dates du fichier.
     """
+    if raw:
+        return
     if created:
-        ProfilStagiaire.objects.create(
-            user=instance,
-            date_debut_stage=timezone.now().date(),  # tu peux adapter par défaut
-            date_fin_stage=timezone.now().date() + timezone.timedelta(days=90)  # exemple 3 mois
-        )
+        if role_compte(instance) == 'stagiaire':
+            profil_par_defaut(instance).save()
+    elif update_fields is None or {'is_staff', 'is_superuser'} & set(update_fields):
+        # Pas à chaque connexion (update_fields=['last_login'])
+        synchroniser_profil(instance)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def profil_selon_groupes(sender, instance, action, reverse, pk_set, **kwargs):
+    """Entrée ou sortie du groupe Tuteurs : le profil suit le rôle"""
+    if action == 'pre_clear' and reverse:
+        # groupe.user_set.clear() ne transmet pas les comptes retirés
+        instance._membres_retires = set(instance.user_set.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        synchroniser_profil(instance)
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_membres_retires', None)
+    for user in User.objects.filter(pk__in=pk_set or []):
+        synchroniser_profil(user)
+
+
+@receiver(post_save, sender=Tache)
+def actualiser_totaux_apres_enregistrement(sender, instance, created, raw=False, **kwargs):
+    """
+    Maintient les totaux Semaine / SalaireMensuel par deltas sur le chemin
+    d'écriture, les lignes étant créées à l'arrivée de la première tâche.
+    Un changement direct des heures est reporté au journal des saisies.
+    """
+    if raw:
+        return
+    ancien = getattr(instance, '_etat_rollup', None)
+    nouveau = instance.etat_rollup()
+    if created or ancien is not None:
+        ancien = None if created else ancien
+        enregistrer_ecriture(ancien, nouveau)
+        saisie = saisie_corrective(ancien, nouveau, instance.pk)
+        if saisie is not None:
+            saisie.save()
+    else:
+        # État d'origine inconnu : recalcul complet
+        actualiser_rollups(instance.stagiaire_id, instance.semaine_numero, instance.annee)
+        heures = ecart_journal(instance)
+        if heures:
+            SaisieHeures.objects.create(stagiaire_id=instance.stagiaire_id, tache=instance, heures=heures)
+    instance._etat_rollup = nouveau
+
+
+@receiver(post_delete, sender=Tache)
+def actualiser_totaux_apres_suppression(sender, instance, **kwargs):
+    """Retire la contribution de la tâche sans recréer de ligne"""
+    ancien = getattr(instance, '_etat_rollup', None) or instance.etat_rollup()
+    enregistrer_ecriture(ancien, None)
+
+
+@receiver(post_save, sender=Evaluation)
+@receiver(post_delete, sender=Evaluation)
+def actualiser_bilan_apres_evaluation(sender, instance, raw=False, **kwargs):
+    """Tient à jour le bilan des évaluations du stagiaire"""
+    if raw:
+        return
+    actualiser_bilan_evaluations(instance.stagiaire_id)
+
+
+@receiver(post_save, sender=Tache)
+@receiver(post_delete, sender=Tache)
+@receiver(post_save, sender=Semaine)
+@receiver(post_delete, sender=Semaine)
+@receiver(post_save, sender=SalaireMensuel)
+@receiver(post_delete, sender=SalaireMensuel)
+@receiver(post_save, sender=Evaluation)
+@receiver(post_delete, sender=Evaluation)
+@receiver(post_save, sender=ProfilStagiaire)
+def invalider_cache_stagiaire(sender, instance, **kwargs):
+    """Toute écriture d'une donnée du stagiaire périme son cache"""
+    invalider_stagiaire(instance.pk if sender is ProfilStagiaire else instance.stagiaire_id)
+
+
+@receiver(post_migrate)
+def reinstaller_recherche(sender, using, **kwargs):
+    """
+    Sous SQLite, reconstruire une table (AlterField...) supprime ses
+    triggers : on les recrée après chaque migrate, une fois l'index installé.
+    """
+    if sender.name != 'objectifs':
+        return
+    if ('objectifs', '0008_recherche_fts') in MigrationRecorder(connections[using]).applied_migrations():
+        installer_recherche(using=using)
+
+
+@receiver(connection_created)
+def journaliser_pragmas(sender, connection, **kwargs):
+    """
+    Pragmas SQLite effectifs, journalisés à la première connexion de chaque
+    base du processus (runserver, WSGI, commandes) : le check objectifs.I001
+    ne tourne qu'avec ``check --database``.
+    """
+    if connection.vendor != 'sqlite' or connection.alias in _bases_journalisees:
+        return
+    _bases_journalisees.add(connection.alias)
+    valeurs = pragmas_effectifs(connection.alias)
+    logger.info(
+        "Base '%s' (profil %s) : %s", connection.alias, settings.DB_PROFILE,
+        ', '.join(f'{pragma}={valeur}' for pragma, valeur in valeurs.items()),
+    )
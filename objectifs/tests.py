@@ -1,3 +1,394 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+import json
+import threading
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, close_old_connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .calendrier import semaine_iso
+from .dashboard import construire_snapshot
+from .inscriptions import groupe_tuteurs, inscrire_cohorte, role_compte
+from .lots import appliquer_lot
+from .rollups import cloturer_mois, delta_mois
+from .models import ProfilStagiaire, Tache, SaisieHeures, Semaine, SalaireMensuel, Evaluation
+
+
+class AjouterHeuresConcurrentTest(TransactionTestCase):
+    """Ajouts d'heures simultanés sur une même tâche"""
+
+    THREADS = 8
+    AJOUTS_PAR_THREAD = 10
+
+    def setUp(self):
+        self.profil = User.objects.create_user('stagiaire').profil_stagiaire
+        annee, numero = semaine_iso(timezone.now().date())
+        self.tache = Tache.objects.create(
+            stagiaire=self.profil,
+            titre="Tâche partagée",
+            jour_semaine=1,
+            heures_estimees=Decimal("10.00"),
+            semaine_numero=numero,
+            annee=annee,
+        )
+
+    def test_aucun_ajout_perdu(self):
+        depart = threading.Barrier(self.THREADS)
+        erreurs = []
+
+        def ajouter():
+            try:
+                # Chaque thread part d'une instance lue avant les ajouts des autres
+                tache = Tache.objects.get(pk=self.tache.pk)
+                depart.wait()
+                for _ in range(self.AJOUTS_PAR_THREAD):
+                    tache.ajouter_heures("0.25")
+            except Exception as exc:
+                erreurs.append(exc)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=ajouter) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(erreurs, [])
+        attendu = Decimal("0.25") * self.THREADS * self.AJOUTS_PAR_THREAD
+
+        self.tache.refresh_from_db()
+        self.assertEqual(self.tache.heures_effectuees, attendu)
+        # 10 heures estimées atteintes : terminée une seule fois
+        self.assertTrue(self.tache.est_terminee)
+        self.assertIsNotNone(self.tache.date_completion)
+
+        semaine = Semaine.objects.get(stagiaire=self.profil)
+        self.assertEqual(semaine.heures_totales, attendu)
+        self.assertEqual(semaine.taches_completees, 1)
+        self.assertEqual(semaine.calculer_totaux(), {})
+
+
+class AjouterHeuresDepassementTest(TestCase):
+    """Un ajout qui dépasserait la capacité de heures_effectuees est refusé sans rien écrire"""
+
+    def setUp(self):
+        user = User.objects.create_user('stagiaire', password='secret')
+        annee, numero = semaine_iso(timezone.now().date())
+        self.tache = Tache.objects.create(
+            stagiaire=user.profil_stagiaire,
+            titre="Tâche",
+            jour_semaine=1,
+            heures_estimees=Decimal("10.00"),
+            heures_effectuees=Decimal("999.00"),
+            semaine_numero=numero,
+            annee=annee,
+        )
+        self.client.force_login(user)
+        self.url = reverse('ajouter_heures', args=[self.tache.pk])
+
+    def verifier_refus(self, heures):
+        saisies = SaisieHeures.objects.count()
+        response = self.client.post(self.url, {'heures': heures})
+        self.assertEqual(response.status_code, 400)
+        self.tache.refresh_from_db()
+        self.assertEqual(self.tache.heures_effectuees, Decimal("999.00"))
+        self.assertEqual(SaisieHeures.objects.count(), saisies)
+
+    def test_valeur_trop_grande(self):
+        self.verifier_refus('1e10')
+
+    def test_total_trop_grand(self):
+        self.verifier_refus('1.5')
+
+    def test_total_a_la_limite(self):
+        response = self.client.post(self.url, {'heures': '0.99'})
+        self.assertEqual(response.status_code, 302)
+        self.tache.refresh_from_db()
+        self.assertEqual(self.tache.heures_effectuees, Tache.HEURES_MAX)
+
+
+class SnapshotDashboardTest(TestCase):
+    """Le dashboard d'un stagiaire coûte un nombre fixe de requêtes"""
+
+    # Tâches de la semaine, agrégat mois/trimestre, évaluation, Semaine, SalaireMensuel
+    REQUETES = 5
+
+    def setUp(self):
+        # Profil relu comme dans la vue (taux horaire en Decimal)
+        self.profil = ProfilStagiaire.objects.get(user=User.objects.create_user('stagiaire'))
+        self.today = timezone.now().date()
+        self.annee, self.numero = semaine_iso(self.today)
+
+    def ajouter_taches(self, nombre):
+        for index in range(nombre):
+            Tache.objects.create(
+                stagiaire=self.profil,
+                titre=f"Tâche {index}",
+                jour_semaine=index % 6 + 1,
+                heures_estimees=Decimal("2.00"),
+                heures_effectuees=Decimal("1.00"),
+                semaine_numero=self.numero,
+                annee=self.annee,
+            )
+
+    def test_requetes_constantes(self):
+        self.ajouter_taches(1)
+        with self.assertNumQueries(self.REQUETES):
+            peu = construire_snapshot(self.profil, self.today)
+        self.ajouter_taches(20)
+        with self.assertNumQueries(self.REQUETES):
+            beaucoup = construire_snapshot(self.profil, self.today)
+
+        self.assertEqual(peu['taches_semaine'], 1)
+        self.assertEqual(beaucoup['taches_semaine'], 21)
+        self.assertEqual(beaucoup['heures_semaine'], Decimal("21.00"))
+
+
+class TachesLotTest(TestCase):
+    """Lots de tâches : tout ou rien, semaines ISO validées"""
+
+    def setUp(self):
+        user = User.objects.create_user('stagiaire', password='secret')
+        self.profil = ProfilStagiaire.objects.get(user=user)
+        self.annee, self.numero = semaine_iso(timezone.now().date())
+        self.tache = Tache.objects.create(
+            stagiaire=self.profil,
+            titre="Existante",
+            jour_semaine=1,
+            heures_estimees=Decimal("4.00"),
+            heures_effectuees=Decimal("1.00"),
+            semaine_numero=self.numero,
+            annee=self.annee,
+        )
+        self.client.force_login(user)
+
+    def creation(self, **champs):
+        return {'action': 'creer', 'titre': "Nouvelle", 'jour_semaine': 'mardi', 'heures_estimees': '2', **champs}
+
+    def test_lot_invalide_sans_ecriture(self):
+        heures_semaine = Semaine.objects.get(stagiaire=self.profil).heures_totales
+        operations = [
+            self.creation(),
+            {'action': 'modifier', 'id': self.tache.pk, 'titre': "Renommée"},
+            {'action': 'supprimer', 'id': self.tache.pk + 1000},
+        ]
+        response = self.client.post(reverse('taches_lot'), json.dumps(operations), content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        resultats = response.json()['resultats']
+        self.assertEqual([resultat['index'] for resultat in resultats], [2])
+        self.assertEqual(Tache.objects.count(), 1)
+        self.tache.refresh_from_db()
+        self.assertEqual(self.tache.titre, "Existante")
+        self.assertEqual(Semaine.objects.get(stagiaire=self.profil).heures_totales, heures_semaine)
+
+    def test_semaine_53(self):
+        # 2026 compte 53 semaines ISO, 2025 seulement 52
+        succes, _ = appliquer_lot(self.profil, [self.creation(annee=2026, semaine_numero=53)])
+        self.assertTrue(succes)
+        self.assertEqual(Tache.objects.get(titre="Nouvelle").date_jour, date(2026, 12, 29))
+
+        succes, resultats = appliquer_lot(self.profil, [self.creation(annee=2025, semaine_numero=53)])
+        self.assertFalse(succes)
+        self.assertIn('semaine_numero', resultats[0]['errors'])
+        self.assertEqual(Tache.objects.filter(annee=2025).count(), 0)
+
+
+class CloturerMoisTest(TestCase):
+    """Un mois clôturé est calculé une fois puis ne bouge plus"""
+
+    def setUp(self):
+        self.profil = ProfilStagiaire.objects.get(user=User.objects.create_user('stagiaire'))
+        # Semaine ISO 38 de 2026 : du 14 au 19 septembre
+        self.tache = Tache.objects.create(
+            stagiaire=self.profil,
+            titre="Tâche",
+            jour_semaine=1,
+            heures_estimees=Decimal("8.00"),
+            heures_effectuees=Decimal("3.00"),
+            semaine_numero=38,
+            annee=2026,
+        )
+
+    def salaire(self):
+        return SalaireMensuel.objects.get(stagiaire=self.profil, mois=9, annee=2026)
+
+    def test_cloture(self):
+        resultat = cloturer_mois(2026, 9, dry_run=True)
+        self.assertEqual(resultat['clotures'], 1)
+        self.assertFalse(self.salaire().est_cloture)
+
+        resultat = cloturer_mois(2026, 9)
+        self.assertEqual((resultat['clotures'], resultat['deja_clotures']), (1, 0))
+        self.assertEqual(resultat['heures'], Decimal("3.00"))
+        salaire = self.salaire()
+        self.assertTrue(salaire.est_cloture)
+        self.assertIsNotNone(salaire.date_cloture)
+        self.assertEqual(salaire.salaire_brut, Decimal("20.07"))
+
+        resultat = cloturer_mois(2026, 9)
+        self.assertEqual((resultat['clotures'], resultat['deja_clotures']), (0, 1))
+
+    def test_ecritures_ignorees_apres_cloture(self):
+        cloturer_mois(2026, 9)
+        avant = self.salaire()
+
+        self.tache.ajouter_heures("2")
+        delta_mois(self.profil.pk, 2026, 9, Decimal("1.00"))
+
+        apres = self.salaire()
+        self.assertEqual(
+            (apres.heures_totales, apres.salaire_brut, apres.salaire_net),
+            (avant.heures_totales, avant.salaire_brut, avant.salaire_net),
+        )
+        # La semaine, elle, suit toujours les saisies
+        self.assertEqual(Semaine.objects.get(stagiaire=self.profil).heures_totales, Decimal("5.00"))
+
+
+class CycleStagesTest(TestCase):
+    """Statuts alignés sur les dates de stage par la commande cycle_stages"""
+
+    TODAY = date(2026, 10, 17)
+    # Identifiant : (statut, début, fin, statut attendu)
+    PROFILS = {
+        'fin_passee': ('actif', date(2026, 6, 1), date(2026, 10, 16), 'termine'),
+        'jamais_commence': ('a_venir', date(2026, 6, 1), date(2026, 10, 16), 'termine'),
+        'debut_atteint': ('a_venir', date(2026, 10, 17), date(2027, 1, 15), 'actif'),
+        'pas_commence': ('actif', date(2026, 10, 18), date(2027, 1, 15), 'a_venir'),
+        'en_cours': ('actif', date(2026, 9, 1), date(2026, 10, 17), 'actif'),
+        'suspendu': ('suspendu', date(2026, 6, 1), date(2026, 10, 16), 'suspendu'),
+        'deja_termine': ('termine', date(2026, 1, 5), date(2026, 4, 3), 'termine'),
+    }
+
+    def setUp(self):
+        for username, (statut, debut, fin, _) in self.PROFILS.items():
+            User.objects.create_user(username)
+            ProfilStagiaire.objects.filter(user__username=username).update(
+                statut=statut, date_debut_stage=debut, date_fin_stage=fin,
+            )
+
+    def statuts(self):
+        return dict(ProfilStagiaire.objects.values_list('user__username', 'statut'))
+
+    def lancer(self, *options):
+        sortie = StringIO()
+        call_command('cycle_stages', '--date', self.TODAY.isoformat(), *options, stdout=sortie)
+        return sortie.getvalue()
+
+    def test_transitions(self):
+        sortie = self.lancer()
+        self.assertIn("2 stage(s) terminé(s), 1 démarré(s), 1 remis à venir", sortie)
+        self.assertEqual(self.statuts(), {username: attendu for username, (*_, attendu) in self.PROFILS.items()})
+        # Idempotente : un second passage ne change rien
+        self.assertIn("0 stage(s) terminé(s), 0 démarré(s), 0 remis à venir", self.lancer())
+
+    def test_dry_run(self):
+        avant = self.statuts()
+        self.assertIn("[dry-run] 2 stage(s) terminé(s), 1 démarré(s), 1 remis à venir", self.lancer('--dry-run'))
+        self.assertEqual(self.statuts(), avant)
+
+
+class AdminChangelistRequetesTest(TestCase):
+    """Le nombre de requêtes d'une liste admin ne dépend pas du nombre de lignes"""
+
+    LISTES = ['profilstagiaire', 'tache', 'saisieheures', 'semaine', 'salairemensuel', 'evaluation']
+    # Session, utilisateur, comptages, filtres et lignes
+    MAX_REQUETES = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        cls.annee, cls.numero = semaine_iso(timezone.now().date())
+
+    def ajouter_stagiaires(self, nombre):
+        for _ in range(nombre):
+            index = User.objects.count()
+            user = User.objects.create_user(f'stagiaire{index}', first_name='Prénom', last_name=f'Nom{index}')
+            profil = user.profil_stagiaire
+            for jour in (1, 2):
+                Tache.objects.create(
+                    stagiaire=profil,
+                    titre=f"Tâche {jour}",
+                    jour_semaine=jour,
+                    heures_estimees=Decimal("4.00"),
+                    heures_effectuees=Decimal("1.50"),
+                    semaine_numero=self.numero,
+                    annee=self.annee,
+                )
+            Evaluation.objects.create(
+                stagiaire=profil, evaluateur=self.admin, type_evaluation='hebdomadaire',
+                competence_technique=4, qualite_travail=3, autonomie=4, communication=5, respect_delais=3,
+            )
+
+    def compter_requetes(self, liste):
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(reverse(f'admin:objectifs_{liste}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(requetes)
+
+    def test_requetes_constantes(self):
+        self.client.force_login(self.admin)
+        self.ajouter_stagiaires(2)
+        peu = {liste: self.compter_requetes(liste) for liste in self.LISTES}
+        self.ajouter_stagiaires(20)
+        beaucoup = {liste: self.compter_requetes(liste) for liste in self.LISTES}
+
+        self.assertEqual(beaucoup, peu)
+        for liste, nombre in beaucoup.items():
+            self.assertLessEqual(nombre, self.MAX_REQUETES, liste)
+
+    def test_colonnes_calculees(self):
+        self.client.force_login(self.admin)
+        self.ajouter_stagiaires(1)
+        response = self.client.get(reverse('admin:objectifs_tache_changelist'))
+        self.assertContains(response, '37.5%')
+        # Heures entières : pas de division entière en SQL
+        Tache.objects.update(heures_estimees=Decimal("3"), heures_effectuees=Decimal("2"))
+        response = self.client.get(reverse('admin:objectifs_tache_changelist'))
+        self.assertContains(response, '66.7%')
+        tache = response.context['cl'].result_list[0]
+        self.assertEqual(round(tache.pourcentage, 2), round(tache.pourcentage_completion, 2))
+        response = self.client.get(reverse('admin:objectifs_evaluation_changelist'))
+        self.assertContains(response, '3.80/5')
+        response = self.client.get(reverse('admin:objectifs_profilstagiaire_changelist'), {'o': '8'})
+        self.assertContains(response, '90 jours')
+
+
+class ConnexionSelonRoleTest(TestCase):
+    """Comptes sans profil stagiaire : redirigés selon leur rôle après connexion"""
+
+    def connecter(self, username):
+        return self.client.post(reverse('connexion'), {'username': username, 'password': 'secret'}, follow=True)
+
+    def test_personnel(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        response = self.connecter('admin')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.redirect_chain[-1][0], reverse('admin:index'))
+
+    def test_tuteur(self):
+        tuteur = User.objects.create_user('tuteur', password='secret')
+        tuteur.groups.add(groupe_tuteurs())
+        self.assertFalse(ProfilStagiaire.objects.filter(user=tuteur).exists())
+        response = self.connecter('tuteur')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.redirect_chain[-1][0], reverse('dashboard_superviseur'))
+
+    def test_tuteur_importe(self):
+        succes, _ = inscrire_cohorte([{'username': 'tuteur', 'role': 'tuteur'}], jetons=False)
+        self.assertTrue(succes)
+        tuteur = User.objects.get(username='tuteur')
+        self.assertEqual(role_compte(tuteur), 'tuteur')
+        tuteur.set_password('secret')
+        tuteur.save()
+        self.assertFalse(ProfilStagiaire.objects.filter(user=tuteur).exists())
+        response = self.connecter('tuteur')
+        self.assertEqual(response.redirect_chain[-1][0], reverse('dashboard_superviseur'))
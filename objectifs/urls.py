@@ -14,6 +14,7 @@ urlpatterns = [
     
     # Gestion des tâches
     path('tache/ajouter/', views.ajouter_tache, name='ajouter_tache'),
+    path('tache/lot/', views.taches_lot, name='taches_lot'),
     path('tache/<int:tache_id>/ajouter-heures/', views.ajouter_heures, name='ajouter_heures'),
     path('tache/<int:tache_id>/supprimer/', views.supprimer_tache, name='supprimer_tache'),
     path('tache/<int:tache_id>/toggle/', views.toggle_tache, name='toggle_tache'),
@@ -25,4 +26,9 @@ urlpatterns = [
     # Dashboard superviseur
     path('superviseur/', views.dashboard_superviseur, name='dashboard_superviseur'),
     path('superviseur/evaluer/<int:stagiaire_id>/', views.evaluer_stagiaire, name='evaluer_stagiaire'),
+    path('superviseur/recherche/', views.recherche, name='recherche'),
+    path('superviseur/cache/', views.statistiques_cache_view, name='statistiques_cache'),
+    
+    # Paie
+    path('paie/export/', views.export_paie, name='export_paie'),
 ]
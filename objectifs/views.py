@@ -1,8 +1,25 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from decimal import Decimal
+from django.db import transaction
+from django.db.models import Sum, Count, Q
+from django.utils import timezone
+from django.http import JsonResponse, StreamingHttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.middleware.csrf import get_token
+import hashlib
+import json
+
+from .models import ProfilStagiaire, Tache, Semaine, SalaireMensuel, Evaluation
+from .dashboard import construire_snapshot, page_cohorte, page_historique, stats_historique, semaine_en_json
+from .calendrier import semaine_iso
+from .lots import appliquer_lot, TAILLE_MAX_LOT
+from .exports import salaires_a_exporter, FORMATS
+from .recherche import rechercher, INDEX_RECHERCHE
+from .routeurs import lecture_replica, base_de_lecture
+from .cache_stagiaire import donnees_en_cache, statistiques_cache
+from .inscriptions import role_compte
 
 
 # Page de connexion
@@ -25,16 +42,11 @@ def deconnexion_view(request):
     return redirect('connexion')
 
 
-from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
-from django.contrib import messages
-from django.db.models import Sum, Count, Q, Avg
-from django.utils import timezone
-from django.http import JsonResponse
-from datetime import datetime, timedelta
-import calendar
-
-from .models import ProfilStagiaire, Tache, Semaine, SalaireMensuel, Evaluation
+def page_accueil(user):
+    """Page d'arrivée d'un compte sans profil stagiaire, selon son rôle"""
+    if role_compte(user) == 'personnel':
+        return 'admin:index'
+    return 'dashboard_superviseur'
 
 
 @login_required
@@ -44,154 +56,30 @@ def dashboard_stagiaire(request):
     try:
         profil = request.user.profil_stagiaire
     except ProfilStagiaire.DoesNotExist:
-        messages.error(request, "Profil stagiaire non trouvé.")
-        return redirect('home')
+        # Personnel et tuteurs n'ont pas de profil stagiaire
+        return redirect(page_accueil(request.user))
     
-    # Date actuelle et semaine
+    # Lecture seule : les totaux sont maintenus lors de l'écriture des tâches,
+    # et le snapshot reste en cache tant que le stagiaire n'écrit rien
     today = timezone.now().date()
-    current_week = today.isocalendar()[1]
-    current_year = today.year
-    current_month = today.month
-    
-    # Obtenir ou créer la semaine courante
-    semaine_debut = today - timedelta(days=today.weekday())
-    semaine_fin = semaine_debut + timedelta(days=5)  # Jusqu'à samedi
-    
-    semaine_actuelle, created = Semaine.objects.get_or_create(
-        stagiaire=profil,
-        numero_semaine=current_week,
-        annee=current_year,
-        defaults={
-            'date_debut': semaine_debut,
-            'date_fin': semaine_fin,
-        }
-    )
-    
-    # Calculer les totaux de la semaine
-    semaine_actuelle.calculer_totaux()
-    
-    # Tâches de la semaine groupées par jour
-    taches_semaine = Tache.objects.filter(
-        stagiaire=profil,
-        semaine_numero=current_week,
-        annee=current_year
-    ).order_by('jour_semaine', '-priorite')
-    
-    # Organiser les tâches par jour
-    jours = ['lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi']
-    taches_par_jour = {}
-    heures_par_jour = {}
-    
-    for jour in jours:
-        taches_jour = taches_semaine.filter(jour_semaine=jour)
-        taches_par_jour[jour] = taches_jour
-        heures_par_jour[jour] = sum(float(t.heures_effectuees) for t in taches_jour)
-    
-    # Statistiques du mois
-    salaire_mois, created = SalaireMensuel.objects.get_or_create(
-        stagiaire=profil,
-        mois=current_month,
-        annee=current_year
-    )
-    
-    # Calculer heures et salaire du mois
-    taches_mois = Tache.objects.filter(
-        stagiaire=profil,
-        annee=current_year,
-        semaine_numero__in=get_weeks_in_month(current_year, current_month)
+    snapshot = donnees_en_cache(
+        'dashboard', profil, lambda: construire_snapshot(profil, today), suffixe=today.isoformat()
     )
     
-    heures_mois = sum(Decimal(t.heures_effectuees) for t in taches_mois)
-
-    # Stocker dans salaire_mois
-    salaire_mois.heures_totales = heures_mois
-    # Salaire brut = heures * taux horaire (Decimal * Decimal)
-    salaire_mois.salaire_brut = heures_mois * profil.taux_horaire
-    # Calcul du salaire net
-    salaire_mois.calculer_salaire_net()
-    # Calculer le trimestre (T1, T2, T3, T4)
-    trimestre = ((current_month - 1) // 3) + 1
-    mois_trimestre = [(trimestre - 1) * 3 + i for i in range(1, 4)]
-    
-    # Heures et salaire du trimestre
-    heures_trimestre = 0
-    salaire_trimestre = 0
-    
-    for mois in mois_trimestre:
-        if mois <= 12:
-            weeks = get_weeks_in_month(current_year, mois)
-            taches_mois_t = Tache.objects.filter(
-                stagiaire=profil,
-                annee=current_year,
-                semaine_numero__in=weeks
-            )
-            heures_t = sum(float(t.heures_effectuees) for t in taches_mois_t)
-            heures_trimestre += heures_t
-    
-    salaire_trimestre = heures_trimestre * float(profil.taux_horaire)
-    
-    # Statistiques générales
-    total_taches = taches_semaine.count()
-    taches_completees = taches_semaine.filter(est_terminee=True).count()
-    taches_en_cours = total_taches - taches_completees
-    
-    # Progression
-    progression = (taches_completees / total_taches * 100) if total_taches > 0 else 0
-    
-    # Dernière évaluation
-    derniere_eval = Evaluation.objects.filter(stagiaire=profil).first()
-    
+    # Les colonnes en cache contiennent des formulaires : le jeton CSRF
+    # n'est valable que pour le secret de ce navigateur, qui entre dans la clé
+    get_token(request)
     context = {
+        **snapshot,
         'profil': profil,
-        'semaine_actuelle': semaine_actuelle,
-        'taches_par_jour': taches_par_jour,
-        'heures_par_jour': heures_par_jour,
-        'jours': jours,
-        'jours_labels': {
-            'lundi': 'Lundi',
-            'mardi': 'Mardi',
-            'mercredi': 'Mercredi',
-            'jeudi': 'Jeudi',
-            'vendredi': 'Vendredi',
-            'samedi': 'Samedi',
-        },
-        
-        # Stats semaine
-        'heures_semaine': semaine_actuelle.heures_totales,
-        'taches_semaine': total_taches,
-        'taches_completees': taches_completees,
-        'taches_en_cours': taches_en_cours,
-        'progression': progression,
-        'salaire_semaine': semaine_actuelle.salaire_calcule,
-        
-        # Stats mois
-        'heures_mois': heures_mois,
-        'salaire_mois': salaire_mois.salaire_net,
-        'mois_nom': calendar.month_name[current_month],
-        
-        # Stats trimestre
-        'heures_trimestre': heures_trimestre,
-        'salaire_trimestre': salaire_trimestre,
-        'trimestre': trimestre,
-        'trimestre_label': f'T{trimestre} {current_year}',
-        
-        # Infos semaine
-        'semaine_numero': current_week,
-        'annee': current_year,
-        'date_debut': semaine_debut,
-        'date_fin': semaine_fin,
-        
-        # Évaluation
-        'derniere_eval': derniere_eval,
-        
-        # Dates
-        'today': today,
+        'cle_csrf': hashlib.sha256(request.META['CSRF_COOKIE'].encode()).hexdigest()[:16],
     }
     
     return render(request, 'stagiaires/dashboard.html', context)
 
 
 @login_required
+@transaction.atomic
 def ajouter_tache(request):
     """Ajouter une nouvelle tâche"""
     
@@ -210,23 +98,27 @@ def ajouter_tache(request):
     heures_estimees = request.POST.get('heures_estimees')
     heures_effectuees = request.POST.get('heures_effectuees', 0)
     remarques = request.POST.get('remarques', '')
-    priorite = request.POST.get('priorite', 'moyenne')
+    priorite = request.POST.get('priorite', Tache.PRIORITE_MOYENNE)
     
     # Validation
     if not all([titre, jour_semaine, heures_estimees]):
         return JsonResponse({'error': 'Champs obligatoires manquants'}, status=400)
     
+    jour_semaine = Tache.jour_depuis(jour_semaine)
+    priorite = Tache.priorite_depuis(priorite)
+    if jour_semaine is None or priorite is None:
+        return JsonResponse({'error': 'Jour ou priorité invalide'}, status=400)
+    
     # Date et semaine
     today = timezone.now().date()
-    current_week = today.isocalendar()[1]
-    current_year = today.year
+    current_year, current_week = semaine_iso(today)
     
-    # Créer la tâche
+    # Créer la tâche (les totaux de la semaine et du mois suivent via les signaux)
     tache = Tache.objects.create(
         stagiaire=profil,
         titre=titre,
         description=description,
-        jour_semaine=jour_semaine.lower(),
+        jour_semaine=jour_semaine,
         heures_estimees=float(heures_estimees),
         heures_effectuees=float(heures_effectuees),
         remarques=remarques,
@@ -236,21 +128,6 @@ def ajouter_tache(request):
         est_terminee=(float(heures_effectuees) >= float(heures_estimees))
     )
     
-    # Mettre à jour la semaine
-    semaine_debut = today - timedelta(days=today.weekday())
-    semaine_fin = semaine_debut + timedelta(days=5)
-    
-    semaine, created = Semaine.objects.get_or_create(
-        stagiaire=profil,
-        numero_semaine=current_week,
-        annee=current_year,
-        defaults={
-            'date_debut': semaine_debut,
-            'date_fin': semaine_fin,
-        }
-    )
-    semaine.calculer_totaux()
-    
     messages.success(request, 'Tâche ajoutée avec succès!')
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -264,31 +141,55 @@ def ajouter_tache(request):
 
 
 @login_required
-def ajouter_heures(request, tache_id):
-    """Ajouter des heures à une tâche existante"""
+def taches_lot(request):
+    """
+    Crée, modifie et supprime plusieurs tâches en une requête.
+
+    Corps JSON : liste d'opérations {"action": "creer" | "modifier" | "supprimer",
+    "id": ..., champs de la tâche}. Tout ou rien : la réponse donne le
+    résultat de chaque opération.
+    """
     
     if request.method != 'POST':
         return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
     
-    tache = get_object_or_404(Tache, id=tache_id, stagiaire=request.user.profil_stagiaire)
+    try:
+        operations = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'error': 'JSON invalide'}, status=400)
     
-    heures = float(request.POST.get('heures', 0))
+    if not isinstance(operations, list) or not operations:
+        return JsonResponse({'error': 'Une liste d\'opérations est attendue'}, status=400)
+    if len(operations) > TAILLE_MAX_LOT:
+        return JsonResponse({'error': f'{TAILLE_MAX_LOT} opérations au maximum par lot'}, status=400)
     
-    if heures <= 0:
-        return JsonResponse({'error': 'Nombre d\'heures invalide'}, status=400)
+    try:
+        profil = request.user.profil_stagiaire
+    except ProfilStagiaire.DoesNotExist:
+        return JsonResponse({'error': 'Profil non trouvé'}, status=404)
+    
+    succes, resultats = appliquer_lot(profil, operations)
+    
+    return JsonResponse({'success': succes, 'resultats': resultats}, status=200 if succes else 400)
+
+
+@login_required
+@transaction.atomic
+def ajouter_heures(request, tache_id):
+    """Ajouter des heures à une tâche existante"""
+    
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
     
-    # Ajouter les heures
-    tache.ajouter_heures(heures)
+    tache = get_object_or_404(Tache, id=tache_id, stagiaire__user=request.user)
     
-    # Mettre à jour la semaine
-    semaine = Semaine.objects.filter(
-        stagiaire=tache.stagiaire,
-        numero_semaine=tache.semaine_numero,
-        annee=tache.annee
-    ).first()
+    heures = request.POST.get('heures', '0').strip().replace(',', '.')
     
-    if semaine:
-        semaine.calculer_totaux()
+    # Ajout atomique (UPDATE ... SET heures = heures + x), valeurs relues ensuite
+    try:
+        tache.ajouter_heures(heures)
+    except ValueError:
+        return JsonResponse({'error': 'Nombre d\'heures invalide'}, status=400)
     
     messages.success(request, f'{heures}h ajoutée(s) à la tâche!')
     
@@ -304,31 +205,17 @@ def ajouter_heures(request, tache_id):
 
 
 @login_required
+@transaction.atomic
 def supprimer_tache(request, tache_id):
     """Supprimer une tâche"""
     
     if request.method != 'POST':
         return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
     
-    tache = get_object_or_404(Tache, id=tache_id, stagiaire=request.user.profil_stagiaire)
-    
-    # Sauvegarder les infos avant suppression
-    semaine_num = tache.semaine_numero
-    annee = tache.annee
-    stagiaire = tache.stagiaire
+    tache = get_object_or_404(Tache, id=tache_id, stagiaire__user=request.user)
     
     tache.delete()
     
-    # Mettre à jour la semaine
-    semaine = Semaine.objects.filter(
-        stagiaire=stagiaire,
-        numero_semaine=semaine_num,
-        annee=annee
-    ).first()
-    
-    if semaine:
-        semaine.calculer_totaux()
-    
     messages.success(request, 'Tâche supprimée avec succès!')
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -338,13 +225,14 @@ def supprimer_tache(request, tache_id):
 
 
 @login_required
+@transaction.atomic
 def toggle_tache(request, tache_id):
     """Marquer une tâche comme terminée/non terminée"""
     
     if request.method != 'POST':
         return JsonResponse({'error': 'Méthode non autorisée'}, status=405)
     
-    tache = get_object_or_404(Tache, id=tache_id, stagiaire=request.user.profil_stagiaire)
+    tache = get_object_or_404(Tache, id=tache_id, stagiaire__user=request.user)
     
     tache.est_terminee = not tache.est_terminee
     
@@ -358,16 +246,6 @@ def toggle_tache(request, tache_id):
     
     tache.save()
     
-    # Mettre à jour la semaine
-    semaine = Semaine.objects.filter(
-        stagiaire=tache.stagiaire,
-        numero_semaine=tache.semaine_numero,
-        annee=tache.annee
-    ).first()
-    
-    if semaine:
-        semaine.calculer_totaux()
-    
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
             'success': True,
@@ -378,17 +256,18 @@ def toggle_tache(request, tache_id):
 
 
 @login_required
+@lecture_replica
 def semaine_details(request, semaine_id):
     """Détails d'une semaine spécifique"""
     
     semaine = get_object_or_404(
         Semaine, 
         id=semaine_id, 
-        stagiaire=request.user.profil_stagiaire
+        stagiaire__user=request.user
     )
     
     taches = Tache.objects.filter(
-        stagiaire=semaine.stagiaire,
+        stagiaire_id=semaine.stagiaire_id,
         semaine_numero=semaine.numero_semaine,
         annee=semaine.annee
     ).order_by('jour_semaine', '-priorite')
@@ -402,33 +281,64 @@ def semaine_details(request, semaine_id):
 
 
 @login_required
+@lecture_replica
 def historique_semaines(request):
-    """Historique de toutes les semaines"""
+    """
+    Historique des semaines, paginé par curseur (?avant=annee-numero).
+
+    Avec ?format=json, renvoie la page en JSON pour le défilement infini ;
+    les statistiques globales ne sont alors calculées que pour la première page.
+    """
     
-    profil = request.user.profil_stagiaire
+    try:
+        profil = request.user.profil_stagiaire
+    except ProfilStagiaire.DoesNotExist:
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'error': 'Profil non trouvé'}, status=404)
+        return redirect(page_accueil(request.user))
     
-    semaines = Semaine.objects.filter(stagiaire=profil).order_by('-annee', '-numero_semaine')
+    avant = request.GET.get('avant')
+    page = page_historique(profil, avant=avant)
     
-    # Statistiques globales
-    total_heures = semaines.aggregate(Sum('heures_totales'))['heures_totales__sum'] or 0
-    total_salaire = semaines.aggregate(Sum('salaire_calcule'))['salaire_calcule__sum'] or 0
-    moyenne_heures = semaines.aggregate(Avg('heures_totales'))['heures_totales__avg'] or 0
+    if request.GET.get('format') == 'json':
+        data = {
+            'semaines': [semaine_en_json(semaine) for semaine in page['semaines']],
+            'page_suivante': page['page_suivante'],
+        }
+        if not avant:
+            data['stats'] = {cle: str(valeur) for cle, valeur in stats_historique(profil).items()}
+        return JsonResponse(data)
     
     context = {
-        'semaines': semaines,
-        'total_heures': total_heures,
-        'total_salaire': total_salaire,
-        'moyenne_heures': round(moyenne_heures, 2),
+        **page,
+        **stats_historique(profil),
     }
     
     return render(request, 'stagiaires/historique.html', context)
 
 
+def statistiques_profil(profil):
+    """Totaux affichés sur la page profil"""
+    totaux = Tache.objects.filter(stagiaire=profil).aggregate(
+        total_taches=Count('id'),
+        taches_terminees=Count('id', filter=Q(est_terminee=True)),
+        total_heures=Sum('heures_effectuees'),
+    )
+    return {
+        **totaux,
+        'total_heures': totaux['total_heures'] or 0,
+        'evaluations': list(Evaluation.objects.filter(stagiaire=profil).order_by('-date_evaluation')[:5]),
+    }
+
+
 @login_required
 def profil_stagiaire(request):
     """Voir et modifier le profil"""
     
-    profil = request.user.profil_stagiaire
+    try:
+        profil = request.user.profil_stagiaire
+    except ProfilStagiaire.DoesNotExist:
+        return redirect(page_accueil(request.user))
     
     if request.method == 'POST':
         # Mise à jour du profil
@@ -444,85 +354,33 @@ def profil_stagiaire(request):
         messages.success(request, 'Profil mis à jour avec succès!')
         return redirect('profil_stagiaire')
     
-    # Statistiques du profil
-    total_taches = Tache.objects.filter(stagiaire=profil).count()
-    taches_terminees = Tache.objects.filter(stagiaire=profil, est_terminee=True).count()
-    total_heures = Tache.objects.filter(stagiaire=profil).aggregate(
-        Sum('heures_effectuees')
-    )['heures_effectuees__sum'] or 0
-    
-    evaluations = Evaluation.objects.filter(stagiaire=profil).order_by('-date_evaluation')[:5]
-    
+    # Statistiques du profil, en cache jusqu'à la prochaine écriture
     context = {
+        **donnees_en_cache('profil', profil, lambda: statistiques_profil(profil)),
         'profil': profil,
-        'total_taches': total_taches,
-        'taches_terminees': taches_terminees,
-        'total_heures': total_heures,
-        'evaluations': evaluations,
     }
     
     return render(request, 'stagiaires/profil.html', context)
 
 
-def get_weeks_in_month(year, month):
-    """Retourne les numéros de semaines dans un mois donné"""
-    first_day = datetime(year, month, 1).date()
-    if month == 12:
-        last_day = datetime(year, 12, 31).date()
-    else:
-        last_day = (datetime(year, month + 1, 1) - timedelta(days=1)).date()
-    
-    weeks = set()
-    current = first_day
-    while current <= last_day:
-        weeks.add(current.isocalendar()[1])
-        current += timedelta(days=1)
-    
-    return list(weeks)
-
-
 # Vue pour les superviseurs/tuteurs
 @login_required
+@lecture_replica
 def dashboard_superviseur(request):
     """Dashboard pour les superviseurs/tuteurs"""
     
-    # Récupérer tous les stagiaires supervisés
-    stagiaires = ProfilStagiaire.objects.filter(tuteur=request.user)
-    
-    today = timezone.now().date()
-    current_week = today.isocalendar()[1]
-    current_year = today.year
-    
-    # Statistiques globales
-    stats = []
-    for stagiaire in stagiaires:
-        semaine = Semaine.objects.filter(
-            stagiaire=stagiaire,
-            numero_semaine=current_week,
-            annee=current_year
-        ).first()
-        
-        if semaine:
-            semaine.calculer_totaux()
-        
-        taches_total = Tache.objects.filter(stagiaire=stagiaire).count()
-        taches_terminees = Tache.objects.filter(
-            stagiaire=stagiaire, 
-            est_terminee=True
-        ).count()
-        
-        stats.append({
-            'stagiaire': stagiaire,
-            'semaine': semaine,
-            'taches_total': taches_total,
-            'taches_terminees': taches_terminees,
-            'progression': (taches_terminees / taches_total * 100) if taches_total > 0 else 0
-        })
+    statut = request.GET.get('statut')
+    if statut not in dict(ProfilStagiaire.STATUT_CHOICES):
+        statut = None
     
     context = {
-        'stagiaires': stagiaires,
-        'stats': stats,
-        'semaine_numero': current_week,
+        **page_cohorte(
+            request.user,
+            tri=request.GET.get('tri', 'progression'),
+            statut=statut,
+            apres=request.GET.get('apres'),
+        ),
+        'statuts': ProfilStagiaire.STATUT_CHOICES,
     }
     
     return render(request, 'stagiaires/dashboard_superviseur.html', context)
@@ -557,4 +415,68 @@ def evaluer_stagiaire(request, stagiaire_id):
         'stagiaire': stagiaire,
     }
     
-    return render(request, 'stagiaires/evaluer.html', context)
\ No newline at end of file
+    return render(request, 'stagiaires/evaluer.html', context)
+
+@staff_member_required
+@lecture_replica
+def export_paie(request):
+    """
+    Export des salaires mensuels en flux (CSV ou JSON Lines).
+
+    Paramètres GET : mois, annee, est_paye (1/0), format (csv/jsonl).
+    """
+    
+    format_export = request.GET.get('format', 'csv')
+    if format_export not in FORMATS:
+        return JsonResponse({'error': 'Format invalide (csv ou jsonl)'}, status=400)
+    
+    try:
+        mois = int(request.GET['mois']) if request.GET.get('mois') else None
+        annee = int(request.GET['annee']) if request.GET.get('annee') else None
+    except ValueError:
+        return JsonResponse({'error': 'Mois ou année invalide'}, status=400)
+    if mois is not None and not 1 <= mois <= 12:
+        return JsonResponse({'error': 'Mois ou année invalide'}, status=400)
+    
+    est_paye = {'1': True, 'true': True, '0': False, 'false': False}.get(
+        request.GET.get('est_paye', '').lower()
+    )
+    
+    generer, content_type = FORMATS[format_export]
+    # Le flux est lu après la fin de la vue : on fixe la base maintenant
+    salaires = salaires_a_exporter(mois=mois, annee=annee, est_paye=est_paye).using(
+        base_de_lecture(SalaireMensuel)
+    )
+    
+    periode = '-'.join(str(v) for v in (annee, mois) if v is not None) or 'tout'
+    response = StreamingHttpResponse(generer(salaires), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="paie-{periode}.{format_export}"'
+    return response
+
+
+@login_required
+def recherche(request):
+    """
+    Recherche plein texte classée (tâches, évaluations, profils) dans les
+    stagiaires supervisés ; le personnel voit tous les stagiaires.
+
+    Paramètres GET : q, type (tache/evaluation/stagiaire, répétable).
+    """
+    
+    texte = request.GET.get('q', '').strip()
+    if not texte:
+        return JsonResponse({'error': 'Paramètre q manquant'}, status=400)
+    
+    types = [cle for cle in request.GET.getlist('type') if cle in INDEX_RECHERCHE] or None
+    tuteur = None if request.user.is_staff else request.user
+    
+    return JsonResponse({
+        'q': texte,
+        'resultats': rechercher(texte, tuteur=tuteur, types=types),
+    })
+
+
+@staff_member_required
+def statistiques_cache_view(request):
+    """Compteurs succès / échecs du cache par stagiaire (processus courant)"""
+    return JsonResponse(statistiques_cache())